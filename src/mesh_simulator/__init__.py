@@ -4,12 +4,6 @@ from __future__ import annotations
 
 __version__ = "0.0.2"
 
-
-from mesa.experimental import JupyterViz
-
-from mesh_simulator.model import MeshModel
-from mesh_simulator.vis import agent_portrayal, connections
-
 model_params = {
     "n_agents": {
         "type": "SliderInt",
@@ -21,13 +15,45 @@ model_params = {
     },
     "width": 10,
     "height": 10,
+    "robustness": {
+        "type": "Checkbox",
+        "value": True,
+        "label": "Report robustness (slow for many agents)",
+    },
 }
 
 
-page = JupyterViz(
-    MeshModel,
-    model_params,
-    measures=[connections, "Reachability", "Robustness", "Power Efficiency"],
-    name="Mesh Network",
-    agent_portrayal=agent_portrayal,
-)
+_VIS_ATTRIBUTES = ("agent_portrayal", "connections", "topology_metrics")
+
+
+def __getattr__(name: str):
+    # The model imports mesa, and the visualization solara and matplotlib, so both are only loaded once they are used.
+    # This keeps headless runs free of the UI stack, and processes that only evaluate metrics free of mesa.
+    if name == "MeshModel":
+        from mesh_simulator.model import MeshModel
+
+        return MeshModel
+    if name in _VIS_ATTRIBUTES:
+        from mesh_simulator import vis
+
+        return getattr(vis, name)
+    if name == "page":
+        from mesa.experimental import JupyterViz
+
+        from mesh_simulator.model import MeshModel
+        from mesh_simulator.vis import agent_portrayal, connections
+
+        global page
+        page = JupyterViz(
+            MeshModel,
+            model_params,
+            measures=[connections, "Reachability", "Robustness", "Power Efficiency"],
+            name="Mesh Network",
+            agent_portrayal=agent_portrayal,
+        )
+        return page
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), "MeshModel", *_VIS_ATTRIBUTES, "page"])
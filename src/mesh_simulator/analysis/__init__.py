@@ -1,35 +1,61 @@
 from __future__ import annotations
 
+from functools import partial
 from typing import TYPE_CHECKING, Callable
 
 import networkx as nx
 
 from mesh_simulator.analysis.graph import Node
+from mesh_simulator.analysis.metrics import cached_metric
 
 if TYPE_CHECKING:
     from mesh_simulator.model import MeshModel
 
 
+def build_topology(model: MeshModel) -> nx.Graph:
+    """Builds the topology graph of a model.
+
+    Every pair of devices that could connect is linked by an edge. Candidates are looked up in the spatial index of the
+    model's grid, so only devices within the largest scan radius of each device are compared. Edges of established
+    connections carry the latency and bandwidth of the protocol in use, all other edges carry those of the first
+    protocol that could be used.
+
+    Args:
+        model (MeshModel): The model to build the graph for.
+
+    Returns:
+        nx.Graph: The topology graph, with the devices as nodes.
+    """
+    g = nx.Graph()
+    agents = list(model.schedule.agents)
+    g.add_nodes_from(agents)
+    for agent in agents:
+        radius = max((p.scan_radius for p in agent.protocols), default=0)
+        for neighbor in model.grid.get_agents_in_radius(agent.pos, radius):
+            if agent is neighbor:
+                continue
+            connection_proto = next((p for p in agent.protocols if p.can_connect(neighbor)), None)
+            if connection_proto is None:
+                continue
+            proto = agent.connections.protocol_for(neighbor)
+            if proto is not None:
+                g.add_edge(agent, neighbor, established=True, latency=proto.latency, bandwidth=proto.bandwidth)
+            else:
+                g.add_edge(
+                    agent,
+                    neighbor,
+                    established=False,
+                    latency=connection_proto.latency,
+                    bandwidth=connection_proto.bandwidth,
+                )
+    return g
+
+
+def _model_metric(metric_fn: Callable[[nx.Graph], float], model: MeshModel) -> float:
+    # Metrics are evaluated once per topology graph, so composite metrics can reuse those of other reporters
+    return cached_metric(model.topology, metric_fn)
+
+
 def metric_from_model(metric_fn: Callable[[nx.Graph], float]) -> Callable[[MeshModel], float]:
-    def wrapper(model: MeshModel) -> float:
-        g = nx.Graph()
-        for agent in model.schedule.agents:
-            g.add_node(agent)
-            for neighbor in model.schedule.agents:
-                if agent == neighbor or not any(p.can_connect(neighbor) for p in agent.protocols):
-                    continue
-                if agent.is_connected(neighbor):
-                    proto, _ = next(filter(lambda x: x[1] == neighbor, agent.connections))
-                    g.add_edge(agent, neighbor, established=True, latency=proto.latency, bandwidth=proto.bandwidth)
-                else:
-                    connection_proto = next(filter(lambda p: p.can_connect(neighbor), agent.protocols))
-                    g.add_edge(
-                        agent,
-                        neighbor,
-                        established=False,
-                        latency=connection_proto.latency,
-                        bandwidth=connection_proto.bandwidth,
-                    )
-        return metric_fn(g)
-
-    return wrapper
+    # A partial of a module-level function, unlike a closure, can be pickled along with the model's DataCollector
+    return partial(_model_metric, metric_fn)
@@ -1,33 +1,79 @@
 from __future__ import annotations
 
-from itertools import combinations
 from statistics import StatisticsError, correlation
+from typing import Callable
 
 import networkx as nx
 
-from mesh_simulator.analysis.graph import Node
+
+def cached_metric(g: nx.Graph, metric: Callable[[nx.Graph], float]) -> float:
+    """Evaluates a metric on a graph, or returns the value it had the last time it was evaluated on that graph.
+
+    The values are stored in the attributes of the graph, so the graph must not be modified after evaluating metrics
+    on it. This lets the reporters of a step, e.g. the overall evaluation, share the metrics computed on its topology.
+
+    Args:
+        g (nx.Graph): The graph to evaluate the metric on.
+        metric (Callable[[nx.Graph], float]): The metric.
+
+    Returns:
+        float: The value of the metric.
+    """
+    cache = g.graph.setdefault("metrics", {})
+    if metric not in cache:
+        cache[metric] = metric(g)
+    return cache[metric]
 
 
 def established_graph(g: nx.Graph) -> nx.Graph:
-    return nx.subgraph_view(g, filter_edge=lambda u, v: g[u][v]["established"])
+    established = nx.Graph()
+    established.add_nodes_from(g)
+    established.add_edges_from((u, v, d) for u, v, d in g.edges(data=True) if d["established"])
+    return established
 
 
 def reachability(g: nx.Graph) -> float:
     return len(list(nx.connected_components(g))) / len(list(nx.connected_components(established_graph(g))))
 
 
+def _sum_of_bottlenecks(tree: nx.Graph, weight: str, groups: dict | None = None) -> float:
+    # The bottleneck of a tree path is its lightest edge. Joining the subtrees in order of descending edge weight, each
+    # edge is the bottleneck for exactly the pairs of nodes it joins. If groups are given, only pairs of nodes in the
+    # same group are counted.
+    if groups is None:
+        groups = dict.fromkeys(tree, None)
+    parent = {node: node for node in tree}
+    members = {node: {groups[node]: 1} for node in tree}
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    total = 0
+    for u, v, w in sorted(tree.edges(data=weight), key=lambda e: e[2], reverse=True):
+        root_u, root_v = find(u), find(v)
+        if len(members[root_u]) < len(members[root_v]):
+            root_u, root_v = root_v, root_u
+        merged, joined = members[root_u], members.pop(root_v)
+        total += w * sum(count * merged.get(group, 0) for group, count in joined.items())
+        for group, count in joined.items():
+            merged[group] = merged.get(group, 0) + count
+        parent[root_v] = root_u
+    return total
+
+
 def _absolute_robustness(g: nx.Graph) -> int:
+    # Sums the number of edge-disjoint paths between all pairs of nodes. By Menger's theorem this is the minimum cut
+    # between the pair, which a Gomory-Hu tree provides for all pairs of a component with one max-flow per node.
     count = 0
-    for a, b in combinations(g, 2):
-        seen: set[Node] = set()
-        # Find all simple paths between a and b in the graph
-        for path in nx.all_simple_paths(g, a, b):
-            path_set = set(path)
-            # Check if the path has only new nodes
-            if seen & path_set == set():
-                count += 1
-            # Add the nodes of the path to the set of seen nodes
-            seen.update(path_set)
+    for component in nx.connected_components(g):
+        if len(component) < 2:
+            continue
+        flow_graph = nx.Graph()
+        flow_graph.add_edges_from(g.subgraph(component).edges, capacity=1)
+        count += _sum_of_bottlenecks(nx.gomory_hu_tree(flow_graph), "weight")
     return count
 
 
@@ -39,17 +85,12 @@ def robustness(g: nx.Graph) -> float:
 
 
 def _absolute_bandwidth(g: nx.Graph) -> float:
-    total_bandwidth = 0.0
-    for a, b in combinations(g, 2):
-        if not nx.has_path(established_graph(g), a, b):
-            continue
-        bandwidth = float("-inf")
-        # Find the minimum bandwidth of all paths between a and b in the graph
-        for path in nx.all_simple_paths(g, a, b):
-            bandwidth = max(bandwidth, min(g[u][v]["bandwidth"] for u, v in zip(path, path[1:])))
-        if bandwidth != float("-inf"):
-            total_bandwidth += bandwidth
-    return total_bandwidth
+    # The widest path between two nodes can always be found in a maximum spanning tree, so the best bottleneck
+    # bandwidth of a pair is the bottleneck of its tree path. Only pairs connected by established connections count.
+    components = {}
+    for i, component in enumerate(nx.connected_components(established_graph(g))):
+        components.update(dict.fromkeys(component, i))
+    return _sum_of_bottlenecks(nx.maximum_spanning_tree(g, weight="bandwidth"), "bandwidth", components)
 
 
 def bandwidth(g: nx.Graph) -> float:
@@ -62,14 +103,18 @@ def bandwidth(g: nx.Graph) -> float:
 def latency(g):
     total_latency = 0
     established_latency = 0
-    for a, b in combinations(g, 2):
-        try:
-            p_potential = nx.shortest_path(g, a, b, weight="latency")
-            p_established = nx.shortest_path(established_graph(g), a, b, weight="latency")
-            total_latency += sum(g[u][v]["latency"] for u, v in zip(p_potential, p_potential[1:]))
-            established_latency += sum(g[u][v]["latency"] for u, v in zip(p_established, p_established[1:]))
-        except nx.NetworkXNoPath:
+    order = {node: i for i, node in enumerate(g)}
+    # One Dijkstra run per source and graph yields the shortest paths to all targets at once
+    for source, established_distances in nx.all_pairs_dijkstra_path_length(established_graph(g), weight="latency"):
+        if len(established_distances) == 1:
             continue
+        potential_distances = nx.single_source_dijkstra_path_length(g, source, weight="latency")
+        for target, distance in established_distances.items():
+            # Only pairs that are connected by established connections count, and each pair only once
+            if order[target] <= order[source]:
+                continue
+            total_latency += potential_distances[target]
+            established_latency += distance
     if established_latency == 0:
         return 1.0
     return total_latency / established_latency
@@ -103,7 +148,7 @@ def evaluate_small(
 ):
     w = [reachability_weight, robustness_weight, bandwidth_weight, latency_weight, power_weight, fairness_weight]
     f = [reachability, robustness, bandwidth, latency, power, fairness]
-    return sum(wi * fi(g) for wi, fi in zip(w, f)) / sum(w)
+    return sum(wi * cached_metric(g, fi) for wi, fi in zip(w, f)) / sum(w)
 
 
 def evaluate_large(
@@ -115,4 +160,4 @@ def evaluate_large(
 ):
     w = [reachability_weight, latency_weight, power_weight, fairness_weight]
     f = [reachability, latency, power, fairness]
-    return sum(wi * fi(g) for wi, fi in zip(w, f)) / sum(w)
+    return sum(wi * cached_metric(g, fi) for wi, fi in zip(w, f)) / sum(w)
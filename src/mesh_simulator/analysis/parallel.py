@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+import networkx as nx
+import numpy as np
+
+from mesh_simulator.analysis.metrics import cached_metric
+
+if TYPE_CHECKING:
+    from mesh_simulator.fast import FastMeshModel
+    from mesh_simulator.model import MeshModel
+
+
+class SnapshotNode:
+    """A node of a snapshot's topology graph, holding the data counters of its device, as the metrics need them."""
+
+    __slots__ = ("index", "own_data", "total_data")
+
+    def __init__(self, index: int, own_data: int, total_data: int):
+        self.index = index
+        self.own_data = own_data
+        self.total_data = total_data
+
+    def __repr__(self):
+        return f"SnapshotNode({self.index})"
+
+
+@dataclass
+class TopologySnapshot:
+    """The state of a topology graph that the metrics depend on, as flat arrays that are cheap to send to another
+    process: the data counters of each device, and both ends and the attributes of each edge."""
+
+    own_data: np.ndarray
+    total_data: np.ndarray
+    sources: np.ndarray
+    targets: np.ndarray
+    established: np.ndarray
+    latency: np.ndarray
+    bandwidth: np.ndarray
+
+    @classmethod
+    def from_graph(cls, g: nx.Graph) -> TopologySnapshot:
+        """Takes a snapshot of a topology graph, as built by `build_topology`.
+
+        Args:
+            g (nx.Graph): The graph, whose nodes have `own_data` and `total_data` attributes.
+        """
+        index = {node: i for i, node in enumerate(g)}
+        edges = list(g.edges(data=True))
+        return cls(
+            own_data=np.fromiter((node.own_data for node in g), dtype=np.int64, count=len(index)),
+            total_data=np.fromiter((node.total_data for node in g), dtype=np.int64, count=len(index)),
+            sources=np.fromiter((index[u] for u, _, _ in edges), dtype=np.int64, count=len(edges)),
+            targets=np.fromiter((index[v] for _, v, _ in edges), dtype=np.int64, count=len(edges)),
+            established=np.fromiter((d["established"] for _, _, d in edges), dtype=bool, count=len(edges)),
+            latency=np.fromiter((d["latency"] for _, _, d in edges), dtype=np.float64, count=len(edges)),
+            bandwidth=np.fromiter((d["bandwidth"] for _, _, d in edges), dtype=np.float64, count=len(edges)),
+        )
+
+    def graph(self) -> nx.Graph:
+        """Rebuilds the topology graph, with SnapshotNode nodes in the order of the original graph."""
+        nodes = [
+            SnapshotNode(i, own_data, total_data)
+            for i, (own_data, total_data) in enumerate(zip(self.own_data.tolist(), self.total_data.tolist()))
+        ]
+        g = nx.Graph()
+        g.add_nodes_from(nodes)
+        g.add_edges_from(
+            (nodes[u], nodes[v], {"established": established, "latency": latency, "bandwidth": bandwidth})
+            for u, v, established, latency, bandwidth in zip(
+                self.sources.tolist(),
+                self.targets.tolist(),
+                self.established.tolist(),
+                self.latency.tolist(),
+                self.bandwidth.tolist(),
+            )
+        )
+        return g
+
+
+def _evaluate(
+    metrics: dict[str, Callable[[nx.Graph], float]], snapshot: TopologySnapshot
+) -> tuple[dict[str, float], dict[str, float]]:
+    # Returns the value of each metric, and the seconds it took to evaluate it
+    g = snapshot.graph()
+    values, seconds = {}, {}
+    for name, metric in metrics.items():
+        start = time.perf_counter()
+        values[name] = cached_metric(g, metric)
+        seconds[name] = time.perf_counter() - start
+    return values, seconds
+
+
+class MetricPool:
+    def __init__(
+        self,
+        metrics: dict[str, Callable[[nx.Graph], float]] | None = None,
+        workers: int | None = None,
+        max_pending: int | None = None,
+    ):
+        """Evaluates the topology metrics of a model on a pool of worker processes, while the model keeps stepping.
+
+        Set the pool as the `metric_pool` of a MeshModel or FastMeshModel. On each collection, the model then takes a
+        TopologySnapshot and submits it to the pool, and evaluates all other reporters right away. Rows are appended to
+        the DataCollector in step order as soon as all rows before them are complete, so they lag behind the model by
+        a few steps. `MeshModel.iter_steps` waits for the outstanding rows before it returns.
+
+        If the model has a profiler, the seconds each metric took in the worker are added to it as "reporter.<name>"
+        when its row is delivered.
+
+        The pool must be shut down with `close`, or by using it as a context manager. Detach it from the model before
+        saving a checkpoint.
+
+        Args:
+            metrics (dict[str, Callable[[nx.Graph], float]], optional): The metrics to evaluate in the workers, by the
+            name of their model reporter. They must be picklable, e.g. module-level functions. Defaults to the
+            `topology_metrics` of each submitted model.
+            workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+            max_pending (int, optional): How many collections may be outstanding before the model waits for the
+            oldest, which bounds the memory held by snapshots. Defaults to twice the number of workers.
+        """
+        self.metrics = dict(metrics) if metrics is not None else None
+        workers = workers if workers is not None else os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(workers)
+        self.max_pending = max_pending if max_pending is not None else 2 * workers
+        self._pending: deque[tuple[int, dict[str, Any], Future]] = deque()
+
+    def __enter__(self) -> MetricPool:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """The number of collections whose rows haven't been delivered yet."""
+        return len(self._pending)
+
+    def submit(self, model: MeshModel | FastMeshModel) -> None:
+        """Collects the current step of a model: submits a snapshot of its topology graph to the workers, and evaluates
+        all reporters that aren't metrics of this pool right away.
+
+        Args:
+            model (MeshModel | FastMeshModel): The model to collect.
+        """
+        metrics = self.metrics if self.metrics is not None else model.topology_metrics
+        values = {
+            name: reporter(model)
+            for name, reporter in model.datacollector.model_reporters.items()
+            if name not in metrics
+        }
+        snapshot = TopologySnapshot.from_graph(model.topology)
+        self._pending.append((model.schedule.steps, values, self._executor.submit(_evaluate, metrics, snapshot)))
+
+    def deliver(self, model: MeshModel | FastMeshModel, wait: bool = False) -> None:
+        """Appends the completed rows to the DataCollector of a model, in step order.
+
+        Args:
+            model (MeshModel | FastMeshModel): The model the rows were collected from.
+            wait (bool, optional): Whether to wait for all outstanding rows. Otherwise, only waits while more than
+            `max_pending` collections are outstanding. Defaults to False.
+        """
+        model_vars = model.datacollector.model_vars
+        while self._pending and (wait or len(self._pending) > self.max_pending or self._pending[0][2].done()):
+            step, values, future = self._pending.popleft()
+            metric_values, seconds = future.result()
+            if model.profiler is not None:
+                for name, metric_seconds in seconds.items():
+                    model.profiler.add(f"reporter.{name}", metric_seconds)
+            row = {**metric_values, **values}
+            for name, column in model_vars.items():
+                column.append(row[name])
+            model._on_collected(step)
+
+    def close(self) -> None:
+        """Shuts down the worker processes, discarding all outstanding rows."""
+        for _, _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown()
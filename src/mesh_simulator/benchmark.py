@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+from loguru import logger
+
+from mesh_simulator import __version__
+from mesh_simulator.analysis import build_topology
+from mesh_simulator.model import TOPOLOGY_METRICS, MeshModel
+
+AGENTS = (50, 100, 200)
+"""The agent counts of the default ladder"""
+DENSITIES = (0.02, 0.05)
+"""The densities of the default ladder, in agents per grid cell"""
+
+
+def _time(fn: Callable[[], Any]) -> tuple[float, Any]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run_case(n_agents: int, density: float, steps: int = 3, warmup: int = 50, seed: int = 0) -> dict[str, Any]:
+    """Times the parts of a MeshModel step on a square grid holding the given number of agents per cell.
+
+    The model first runs `warmup` steps without collecting data, so that the devices have scanned and connected. Then
+    each of the measured steps times, in this order, building the topology graph, each of the TOPOLOGY_METRICS on that
+    graph, the DataCollector collecting all reporters (which builds the graph again), `schedule.step` and moving the
+    devices.
+
+    Args:
+        n_agents (int): The number of devices.
+        density (float): The number of devices per grid cell, which sets the width and height of the grid.
+        steps (int, optional): The number of measured steps. Defaults to 3.
+        warmup (int, optional): The number of steps to run before measuring. Defaults to 50.
+        seed (int, optional): The seed of the model. Defaults to 0.
+
+    Returns:
+        dict[str, Any]: The parameters of the case and, by timer, the median and minimum of the seconds it took.
+    """
+    size = max(1, math.ceil(math.sqrt(n_agents / density)))
+    model = MeshModel(n_agents, size, size, seed=seed)
+    for _ in range(warmup):
+        model.schedule.step()
+        model.mobility.step()
+
+    samples: dict[str, list[float]] = {}
+    for _ in range(steps):
+        elapsed, graph = _time(lambda: build_topology(model))
+        samples.setdefault("topology", []).append(elapsed)
+        for name, metric in TOPOLOGY_METRICS.items():
+            samples.setdefault(f"metric:{name}", []).append(_time(lambda metric=metric: metric(graph))[0])
+        samples.setdefault("datacollector.collect", []).append(_time(lambda: model.datacollector.collect(model))[0])
+        samples.setdefault("schedule.step", []).append(_time(model.schedule.step)[0])
+        samples.setdefault("mobility.step", []).append(_time(model.mobility.step)[0])
+
+    return {
+        "n_agents": n_agents,
+        "density": density,
+        "width": size,
+        "height": size,
+        "steps": steps,
+        "warmup": warmup,
+        "seed": seed,
+        "timings": {
+            name: {"median": statistics.median(values), "min": min(values)} for name, values in samples.items()
+        },
+    }
+
+
+def run(
+    agents: tuple[int, ...] = AGENTS,
+    densities: tuple[float, ...] = DENSITIES,
+    steps: int = 3,
+    warmup: int = 50,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Runs `run_case` for every combination of agent count and density.
+
+    Returns:
+        dict[str, Any]: The results of all cases, along with the versions of the simulator and Python they ran on.
+    """
+    cases = []
+    for n_agents in agents:
+        for density in densities:
+            logger.info(f"Benchmarking {n_agents} agents at density {density}")
+            cases.append(run_case(n_agents, density, steps=steps, warmup=warmup, seed=seed))
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": cases,
+    }
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], threshold: float = 0.25, min_delta: float = 0.001
+) -> list[str]:
+    """Compares benchmark results against a baseline, matching cases by agent count and density.
+
+    Cases and timers that are missing from either side are ignored.
+
+    Args:
+        results (dict[str, Any]): The results to check, as returned by `run`.
+        baseline (dict[str, Any]): The results to compare to.
+        threshold (float, optional): How much slower a median may be, relative to the baseline, before it counts as a
+        regression. Defaults to 0.25.
+        min_delta (float, optional): How many seconds slower a median must be to count as a regression, so that the
+        noise of very fast timers is ignored. Defaults to 0.001.
+
+    Returns:
+        list[str]: A description of each regression, empty if there are none.
+    """
+    baseline_cases = {(case["n_agents"], case["density"]): case["timings"] for case in baseline["cases"]}
+    regressions = []
+    for case in results["cases"]:
+        baseline_timings = baseline_cases.get((case["n_agents"], case["density"]))
+        if baseline_timings is None:
+            continue
+        for name, timing in case["timings"].items():
+            if name not in baseline_timings:
+                continue
+            before, after = baseline_timings[name]["median"], timing["median"]
+            if after > before * (1 + threshold) and after - before > min_delta:
+                regressions.append(
+                    f"{name} with {case['n_agents']} agents at density {case['density']}: "
+                    f"{after * 1000:.2f}ms, was {before * 1000:.2f}ms ({(after / before - 1) * 100:+.0f}%)"
+                )
+    return regressions
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="mesh-simulator-benchmark", description="Time the parts of a MeshModel step at a ladder of sizes."
+    )
+    parser.add_argument(
+        "--agents", type=int, nargs="+", default=AGENTS, help="agent counts to run (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--densities", type=float, nargs="+", default=DENSITIES, help="agents per grid cell (default: %(default)s)"
+    )
+    parser.add_argument("--steps", type=int, default=3, help="number of measured steps (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=50, help="steps to run before measuring (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the models (default: %(default)s)")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="file to write the results to as JSON, '-' for stdout (default: %(default)s)",
+    )
+    parser.add_argument("--baseline", help="JSON results to compare to, exits with status 1 on regressions")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="relative slowdown of a median that counts as a regression (default: %(default)s)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level="INFO", filter=__name__)
+
+    results = run(tuple(args.agents), tuple(args.densities), steps=args.steps, warmup=args.warmup, seed=args.seed)
+    if args.output == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as baseline:
+        regressions = compare(results, json.load(baseline), args.threshold)
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import gzip
+import os
+import pickle
+from typing import TYPE_CHECKING, Union
+
+from mesh_simulator import __version__, packets
+
+if TYPE_CHECKING:
+    from mesh_simulator.fast import FastMeshModel
+    from mesh_simulator.model import MeshModel
+
+    Model = Union[MeshModel, FastMeshModel]
+
+_FORMAT = 1
+
+
+def save(model: Model, path: str | os.PathLike) -> None:
+    """Writes the complete state of a model to a gzip compressed pickle file.
+
+    This includes the devices with their positions, connections, queued tasks and counters, the state of the random
+    number generators and the history of the DataCollector, so that a loaded model continues exactly like the saved one.
+
+    Args:
+        model (MeshModel | FastMeshModel): The model to save.
+        path (str | os.PathLike): The file to write.
+    """
+    state = {
+        "format": _FORMAT,
+        "version": __version__,
+        # Packet ids are unique per process, so packets created after loading must not reuse the ids of saved ones
+        "next_packet_id": next(packets._ids),
+        "model": model,
+    }
+    with gzip.open(path, "wb", compresslevel=6) as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(path: str | os.PathLike) -> Model:
+    """Reads a model written by `save`. Only load checkpoints from trusted sources, as they are pickle files.
+
+    Args:
+        path (str | os.PathLike): The file to read.
+
+    Raises:
+        ValueError: If the file is no checkpoint of a supported format.
+
+    Returns:
+        MeshModel | FastMeshModel: The model, in the state it was saved in.
+    """
+    with gzip.open(path, "rb") as file:
+        state = pickle.load(file)
+    if not isinstance(state, dict) or state.get("format") != _FORMAT:
+        raise ValueError(f"{os.fspath(path)} is no checkpoint of format {_FORMAT}")
+    packets._reserve_ids(state["next_packet_id"])
+    return state["model"]
+
+
+def fork(path: str | os.PathLike, seed: int) -> Model:
+    """Loads a model written by `save` and reseeds it, to branch several runs from the same state, e.g. a mesh that
+    has finished its initial scans and handshakes.
+
+    Args:
+        path (str | os.PathLike): The file to read.
+        seed (int): The seed of the branch.
+
+    Returns:
+        MeshModel | FastMeshModel: The model, with its random number generators reseeded.
+    """
+    model = load(path)
+    model.reseed(seed)
+    return model
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+
+from loguru import logger
+
+from mesh_simulator import checkpoint, tracing
+from mesh_simulator.analysis.parallel import MetricPool
+from mesh_simulator.fast import FastMeshModel
+from mesh_simulator.mobility import RandomWalk, RandomWaypoint, Static
+from mesh_simulator.model import ROBUSTNESS_MAX_AGENTS, MeshModel
+from mesh_simulator.recorder import FORMATS, MetricRecorder
+
+MOBILITY_MODELS = {"random-walk": RandomWalk, "random-waypoint": RandomWaypoint, "static": Static}
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="mesh-simulator", description="Run a mesh network simulation headless.")
+    parser.add_argument("-n", "--agents", type=int, default=100, help="number of devices (default: %(default)s)")
+    parser.add_argument("--width", type=int, default=75, help="width of the grid (default: %(default)s)")
+    parser.add_argument("--height", type=int, default=75, help="height of the grid (default: %(default)s)")
+    parser.add_argument("-s", "--steps", type=int, default=100, help="number of steps to run (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random number generator")
+    engine = parser.add_mutually_exclusive_group()
+    engine.add_argument("--event-driven", action="store_true", help="skip steps on which no device has anything to do")
+    engine.add_argument(
+        "--fast",
+        action="store_true",
+        help="hold the state of all devices in arrays, for large numbers of devices. Approximates the handshakes, so "
+        "the metric values differ from those of the default model",
+    )
+    parser.add_argument(
+        "--mobility",
+        choices=sorted(MOBILITY_MODELS),
+        default="random-walk",
+        help="how the devices move (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="file to write the metrics to as CSV, '-' for stdout (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--collect-every",
+        type=int,
+        default=1,
+        metavar="K",
+        help="collect the metrics every K steps (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--metric-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="evaluate the topology metrics in N worker processes while the model keeps stepping "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--robustness",
+        action=argparse.BooleanOptionalAction,
+        help="report Robustness, which takes longer than everything else from a few dozen agents on "
+        f"(default: only with at most {ROBUSTNESS_MAX_AGENTS} agents)",
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="time the phases of each step and print a summary after the run"
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="stream the metrics to columnar chunk files in a directory, keeping only the last row in memory",
+    )
+    parser.add_argument(
+        "--record-agents", action="store_true", help="also record the energy and data counters of every device"
+    )
+    parser.add_argument(
+        "--record-format",
+        choices=FORMATS,
+        help="file format of the recorded chunks (default: parquet if pyarrow is installed, else npz)",
+    )
+    parser.add_argument(
+        "--load-checkpoint",
+        metavar="PATH",
+        help="continue the model saved in a checkpoint instead of creating one, reseeded with --seed if given. "
+        "The model options are ignored",
+    )
+    parser.add_argument("--save-checkpoint", metavar="PATH", help="save the model to a checkpoint after the run")
+    parser.add_argument("--log-level", default="WARNING", help="minimum level of log messages (default: %(default)s)")
+    parser.add_argument(
+        "--trace",
+        nargs="*",
+        choices=tracing.SUBSYSTEMS,
+        metavar="SUBSYSTEM",
+        help="log the per-step messages of the given subsystems, or of all if none are given "
+        f"({', '.join(tracing.SUBSYSTEMS)}). Use with --log-level DEBUG or TRACE",
+    )
+    parser.add_argument(
+        "--trace-device",
+        action="append",
+        metavar="NAME",
+        help="only trace the given device, e.g. 'Agent 0'. May be repeated, implies --trace",
+    )
+    args = parser.parse_args(argv)
+    if args.collect_every < 1:
+        parser.error("--collect-every must be at least 1")
+    return args
+
+
+def run(model: MeshModel | FastMeshModel, steps: int, output) -> int:
+    """Runs a model until it reached the given step, writing each collected row of metrics to a CSV file as soon as
+    it is collected.
+
+    Args:
+        model (MeshModel | FastMeshModel): The model to run.
+        steps (int): The step at which to stop.
+        output (TextIO): The file to write the metrics to.
+
+    Returns:
+        int: The number of times the model was stepped.
+    """
+    writer = None
+    calls = 0
+    for step, metrics in model.iter_steps(steps):
+        calls += 1
+        if writer is None:
+            writer = csv.writer(output)
+            writer.writerow(["Step", *metrics])
+        writer.writerow([step, *metrics.values()])
+        output.flush()
+    return calls
+
+
+def main(argv: list[str] | None = None):
+    args = _parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper())
+    if args.trace is not None or args.trace_device:
+        tracing.enable(*(args.trace or ()), devices=args.trace_device)
+
+    mobility = MOBILITY_MODELS[args.mobility]()
+    if args.load_checkpoint:
+        if args.seed is None:
+            model = checkpoint.load(args.load_checkpoint)
+        else:
+            model = checkpoint.fork(args.load_checkpoint, args.seed)
+    elif args.fast:
+        model = FastMeshModel(
+            args.agents,
+            args.width,
+            args.height,
+            mobility=mobility,
+            collect_every=args.collect_every,
+            profile=args.profile,
+            robustness=args.robustness,
+            seed=args.seed,
+        )
+    else:
+        model = MeshModel(
+            args.agents,
+            args.width,
+            args.height,
+            event_driven=args.event_driven,
+            mobility=mobility,
+            collect_every=args.collect_every,
+            profile=args.profile,
+            robustness=args.robustness,
+            seed=args.seed,
+        )
+    if args.record:
+        model.recorder = MetricRecorder(args.record, agent_counters=args.record_agents, file_format=args.record_format)
+    if args.metric_workers > 0:
+        model.metric_pool = MetricPool(workers=args.metric_workers)
+    first_step = model.schedule.steps
+    start = time.perf_counter()
+    try:
+        if args.output == "-":
+            calls = run(model, args.steps, sys.stdout)
+        else:
+            with open(args.output, "w", newline="") as output:
+                calls = run(model, args.steps, output)
+        elapsed = time.perf_counter() - start
+    finally:
+        # Shuts down the worker processes even if the run failed
+        if model.metric_pool is not None:
+            model.metric_pool.close()
+            model.metric_pool = None
+    if model.recorder is not None:
+        model.recorder.close()
+        model.recorder = None
+    if args.save_checkpoint:
+        checkpoint.save(model, args.save_checkpoint)
+
+    simulated = model.schedule.steps - first_step
+    rate = simulated / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"Simulated {simulated} steps ({calls} collected) in {elapsed:.2f}s: {rate:.1f} steps/s",
+        file=sys.stderr,
+    )
+    if model.profiler is not None:
+        print(model.profiler.summary(), file=sys.stderr)
@@ -5,22 +5,30 @@ from typing import TYPE_CHECKING, Callable
 import mesa
 from loguru import logger
 
+from mesh_simulator import tracing
+from mesh_simulator.devices.connections import ConnectionTable
 from mesh_simulator.packets import Packet
 from mesh_simulator.packets.handshake import (HandshakePacket,
                                               HandshakePacketType)
+from mesh_simulator.packets.sink import PacketSink
 from mesh_simulator.protocols import Protocol
 from mesh_simulator.tasks import Task, TaskStatus
 from mesh_simulator.tasks.handshake import HandshakeTask
-from mesh_simulator.tasks.scan import ScanTask
+from mesh_simulator.tasks.queue import TaskQueue
 from mesh_simulator.tasks.sendpacket import SendPacketTask
+from mesh_simulator.time import EventActivation
 
 if TYPE_CHECKING:
     from mesh_simulator.layout import LayoutAlgorithm
     from mesh_simulator.model import MeshModel
+    from mesh_simulator.profiling import Profiler
     from mesh_simulator.routing import RoutingAlgorithm
 
 
 class DeviceAgent(mesa.Agent):
+    move_probability: float = 0.1
+    """The chance of moving to a neighboring cell in each step, if the model doesn't move its devices itself"""
+
     def __init__(
         self,
         name: str,
@@ -40,7 +48,7 @@ class DeviceAgent(mesa.Agent):
         """
         super().__init__(name, model)
         self._name = name
-        self._tasks: list[Task] = []
+        self._tasks = TaskQueue()
         self._protocols: list[Protocol] = [protocol(self) for protocol in protocols]
         self.own_data: int = 0
         """The amount of data submitted to the network by the device in the current simulation"""
@@ -50,8 +58,8 @@ class DeviceAgent(mesa.Agent):
         """The amount of energy consumed by the device in the current simulation"""
         self._layout_algorithm = layout_algorithm(self)
         self._routing_algorithm = routing_algorithm(self)
-        self._connections: set[tuple[Protocol, DeviceAgent]] = set()
-        self._received_packets: dict[int, list[Packet]] = {}
+        self._connections = ConnectionTable(self, getattr(model, "adjacency", None))
+        self._received_packets = PacketSink(parent=getattr(model, "packet_sink", None))
 
     @property
     def name(self) -> str:
@@ -61,6 +69,10 @@ class DeviceAgent(mesa.Agent):
     def protocols(self) -> list[Protocol]:
         return self._protocols
 
+    @property
+    def routing_algorithm(self) -> RoutingAlgorithm:
+        return self._routing_algorithm
+
     def __str__(self):
         return f"DeviceAgent {self.name} at {self.pos}"
 
@@ -68,40 +80,63 @@ class DeviceAgent(mesa.Agent):
         return f"DeviceAgent({self.name}, ...)"
 
     @property
-    def connections(self):
+    def connections(self) -> ConnectionTable:
         return self._connections
 
     @property
-    def received_packets(self):
+    def established_neighbors(self) -> list[DeviceAgent]:
+        return self._connections.neighbors()
+
+    @property
+    def received_packets(self) -> PacketSink:
         return self._received_packets
 
-    def _pre_tasks(self):
-        ...
-        # sort all ScanTasks to the back
-        # self._tasks.sort(key=lambda task: not isinstance(task, ScanTask))
+    def _pre_tasks(self): ...
 
     def step(self):
-        logger.trace(f"Stepping {self.name}")
+        if tracing.active and tracing.traces("device", self):
+            logger.trace(f"Stepping {self.name}")
 
-        self._pre_tasks()
-        self._layout_algorithm.step()
-        self._routing_algorithm.step()
+        # Otherwise, the model moves all devices at once after each step
+        moves = getattr(self.model, "mobility", None) is None
+        profiler = getattr(self.model, "profiler", None)
+        if profiler is None:
+            self._pre_tasks()
+            self._layout_algorithm.step()
+            self._routing_algorithm.step()
+            self._run_tasks()
+            self._drop_timeout_connections()
+            if moves:
+                self._move()
+            self._post_tasks()
+        else:
+            # The same phases as above, each timed on its own
+            profiler.call("device.pre_tasks", self._pre_tasks)
+            profiler.call("device.layout", self._layout_algorithm.step)
+            profiler.call("device.routing", self._routing_algorithm.step)
+            profiler.call("device.tasks", self._run_tasks, profiler)
+            profiler.call("device.drop_timeout_connections", self._drop_timeout_connections)
+            if moves:
+                profiler.call("device.move", self._move)
+            profiler.call("device.post_tasks", self._post_tasks)
 
-        while self._tasks and self._tasks[0].status != TaskStatus.PENDING:
-            self._tasks.pop(0)
+    def _run_tasks(self, profiler: Profiler | None = None):
+        while self._tasks and self._tasks.peek().status != TaskStatus.PENDING:
+            self._tasks.pop()
 
         if not self._tasks:
-            logger.trace(f"No tasks for {self.name}")
-        else:
-            active_task = self._tasks[0]
+            if tracing.active and tracing.traces("device", self):
+                logger.trace(f"No tasks for {self.name}")
+            return
+        active_task = self._tasks.peek()
+        if tracing.active and tracing.traces("device", self):
             logger.debug(f"{self.name}: Active task: {active_task}")
+        if profiler is None:
             active_task.step(self)
-            if active_task.status == TaskStatus.COMPLETED or active_task.status == TaskStatus.FAILED:
-                self._tasks.pop(0)
-
-        self._drop_timeout_connections()
-        self._move()
-        self._post_tasks()
+        else:
+            profiler.call(f"task.{type(active_task).__name__}", active_task.step, self)
+        if active_task.status == TaskStatus.COMPLETED or active_task.status == TaskStatus.FAILED:
+            self._tasks.remove(active_task)
 
     def _post_tasks(self):
         return
@@ -113,38 +148,85 @@ class DeviceAgent(mesa.Agent):
 
     def _drop_timeout_connections(self):
         # Check for any dead connections
-        for protocol, other in self._connections.copy():
+        for protocol, other in self._connections:
+            if not protocol.can_connect(other):
+                self._drop_connection(protocol, other)
+
+    def _drop_timeout_connection(self, other: DeviceAgent):
+        # Check whether the connections to a single device died
+        for protocol in self._connections.protocols_for(other):
             if not protocol.can_connect(other):
-                self._connections.remove((protocol, other))
+                self._drop_connection(protocol, other)
+
+    def _drop_connection(self, protocol: Protocol, other: DeviceAgent):
+        self._connections.discard((protocol, other))
+        if not self._connections.has_neighbor(other):
+            self._routing_algorithm.on_connection_lost(other)
 
     def _move(self):
-        if self.random.random() < 0.1:
-            new_cell = self.random.choice(self.model.grid.get_neighborhood(self.pos, moore=True, include_center=False))
-            self.model.grid.move_agent(self, new_cell)
+        if self.random.random() < self.move_probability:
+            self._relocate()
+
+    def _relocate(self):
+        new_cell = self.random.choice(self.model.grid.get_neighborhood(self.pos, moore=True, include_center=False))
+        self.model.grid.move_agent(self, new_cell)
+
+    def idle_steps(self) -> float:
+        """Returns how many of the upcoming steps of this device would only count down timers, apart from the chance
+        of moving. The EventActivation scheduler skips these steps.
+
+        Returns:
+            float: The number of steps that may be skipped using `skip`, or infinity if the device has nothing to do
+            until another device contacts it.
+        """
+        idle_steps = min(self._layout_algorithm.idle_steps(), self._routing_algorithm.idle_steps())
+        active_task = self._tasks.peek()
+        if active_task is not None:
+            if active_task.status != TaskStatus.PENDING:
+                return 0
+            idle_steps = min(idle_steps, active_task.idle_steps())
+        return idle_steps
+
+    def skip(self, steps: int):
+        """Advances the timers of the device as if it had been stepped `steps` times while idle.
+
+        Args:
+            steps (int): The number of steps to skip, at most `idle_steps()`.
+        """
+        self._layout_algorithm.skip(steps)
+        self._routing_algorithm.skip(steps)
+        active_task = self._tasks.peek()
+        if active_task is not None:
+            active_task.skip(steps)
 
     def queue_task(self, task: Task):
-        logger.trace(f"Queuing task: {task}. Tasks: {len(self._tasks)}")
-        self._tasks.append(task)
+        if tracing.active and tracing.traces("device", self):
+            logger.trace(f"Queuing task: {task}. Tasks: {len(self._tasks)}")
+        self._tasks.push(task)
+        if isinstance(self.model.schedule, EventActivation):
+            self.model.schedule.wake(self)
 
     def send_packet(self, protocol: Protocol, packet: Packet, destination: DeviceAgent):
-        logger.trace(f"Queueing packet: {packet}")
-        if protocol is None and self.is_connected(destination):
-            proto = next(proto for proto, device in self._connections if device == destination)
-            self.queue_task(SendPacketTask(destination, proto, packet))
-        else:
-            self.queue_task(SendPacketTask(destination, protocol, packet))
+        if tracing.active and tracing.traces("device", self):
+            logger.trace(f"Queueing packet: {packet}")
+        if protocol is None:
+            protocol = self._connections.protocol_for(destination)
+        self.queue_task(SendPacketTask(destination, protocol, packet))
 
     def send_packet_any_protocol(self, packet: Packet, destination: DeviceAgent):
-        if self.is_connected(destination):
-            logger.debug(f"Sending packet to {destination.name} using existing connection")
-            proto = next(proto for proto, device in self._connections if device == destination)
+        proto = self._connections.protocol_for(destination)
+        if proto is not None:
+            if tracing.active and tracing.traces("device", self):
+                logger.debug(f"Sending packet to {destination.name} using existing connection")
             self.queue_task(SendPacketTask(destination, proto, packet))
         else:
-            logger.debug(f"Sending packet to {destination.name} using routing algorithm")
+            if tracing.active and tracing.traces("device", self):
+                logger.debug(f"Sending packet to {destination.name} using routing algorithm")
             self._routing_algorithm.route(self, None, packet)
 
     def send_packet_immediate(self, protocol: Protocol, packet: Packet, destination: DeviceAgent):
-        logger.trace(f"Sending packet: {packet}")
+        if tracing.active and tracing.traces("device", self):
+            logger.trace(f"Sending packet: {packet}")
         if packet.source is self:
             self.own_data += packet.size_estimate
         self.total_data += packet.size_estimate
@@ -154,12 +236,16 @@ class DeviceAgent(mesa.Agent):
         if not any(type(protocol) == type(p) for p in self._protocols):
             logger.error(f"Received packet from {sender.name} using unsupported protocol {protocol}")
             return
+        if self._routing_algorithm.on_packet(sender, protocol, packet):
+            return
         if packet.destination != self:
             self._routing_algorithm.route(sender, protocol, packet)
             return
-        logger.trace(f"Received packet from {sender.name}: {packet}")
-        logger.debug(f"{self.name}: {self.own_data}, {self.total_data}")
-        if self._tasks and self._tasks[0].on_packet(self, sender, protocol, packet):
+        if tracing.active and tracing.traces("device", self):
+            logger.trace(f"Received packet from {sender.name}: {packet}")
+            logger.debug(f"{self.name}: {self.own_data}, {self.total_data}")
+        active_task = self._tasks.peek()
+        if active_task is not None and active_task.on_packet(self, sender, protocol, packet):
             # Packet was processed by the task
             return
         # The packet might be unsolicited
@@ -167,27 +253,22 @@ class DeviceAgent(mesa.Agent):
         # Check if the packet is a handshake request
         if isinstance(packet, HandshakePacket) and packet.state == HandshakePacketType.REQUEST:
             # Check if we are already handshaking with the sender
-            for task in self._tasks:
-                if isinstance(task, HandshakeTask) and task.other == sender:
-                    return
+            if self._tasks.has_task(HandshakeTask, sender):
+                return
             # Create a new task to handle the handshake
             task = HandshakeTask(sender, protocol, server=True)
             task.on_packet(self, sender, protocol, packet)
-            self._tasks.append(task)
+            self.queue_task(task)
             return
         else:
             # This is a "normal" packet
-            self._received_packets[self.model.schedule.steps] = self._received_packets.get(
-                self.model.schedule.steps, []
-            ) + [packet]
+            self._received_packets.record(self.model.schedule.steps, packet)
 
     def connect(self, other: DeviceAgent, protocol: Protocol):
-        logger.trace(f"Connecting to {other.name} using {protocol}")
+        if tracing.active and tracing.traces("device", self):
+            logger.trace(f"Connecting to {other.name} using {protocol}")
         assert protocol in self._protocols, f"{protocol} not attached to {self}"
         protocol.connect(other)
 
     def is_connected(self, other: DeviceAgent) -> bool:
-        for _, device in self._connections:
-            if device == other:
-                return True
-        return False
+        return self._connections.has_neighbor(other)
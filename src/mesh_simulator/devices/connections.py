@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from mesh_simulator.devices import DeviceAgent
+    from mesh_simulator.protocols import Protocol
+
+
+class Adjacency:
+    def __init__(self):
+        """The model-wide index of established connections, kept in sync by the ConnectionTable of every device.
+
+        It answers which devices hold a connection to a given device, which the devices themselves can't tell without
+        scanning the connections of every other device.
+        """
+        self._incoming: dict[DeviceAgent, dict[DeviceAgent, int]] = {}
+
+    def connected_to(self, device: DeviceAgent) -> list[DeviceAgent]:
+        """Returns the devices that hold at least one connection to a device.
+
+        Args:
+            device (DeviceAgent): The device the connections lead to.
+
+        Returns:
+            list[DeviceAgent]: The devices with a connection to `device`, in the order they connected.
+        """
+        return list(self._incoming.get(device, ()))
+
+    def _link(self, device: DeviceAgent, other: DeviceAgent) -> None:
+        incoming = self._incoming.setdefault(other, {})
+        incoming[device] = incoming.get(device, 0) + 1
+
+    def _unlink(self, device: DeviceAgent, other: DeviceAgent) -> None:
+        incoming = self._incoming[other]
+        incoming[device] -= 1
+        if not incoming[device]:
+            del incoming[device]
+            if not incoming:
+                del self._incoming[other]
+
+
+class ConnectionTable:
+    def __init__(self, device: DeviceAgent, adjacency: Adjacency | None = None):
+        """The established connections of a device, as (protocol, neighbor) pairs.
+
+        The table behaves like a set of these pairs, but is indexed by neighbor and by protocol, so that looking up
+        the connection to a neighbor, adding and removing connections all take constant time. Pairs are iterated in
+        the order they were added.
+
+        Args:
+            device (DeviceAgent): The device owning the connections.
+            adjacency (Adjacency, optional): The model-wide index to keep in sync. Defaults to None.
+        """
+        self._device = device
+        self._adjacency = adjacency
+        self._by_neighbor: dict[DeviceAgent, dict[Protocol, None]] = {}
+        self._by_protocol: dict[Protocol, dict[DeviceAgent, None]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[tuple[Protocol, DeviceAgent]]:
+        # Iterates over a snapshot, so that connections may be dropped while iterating
+        return iter(
+            [(protocol, neighbor) for neighbor, protocols in self._by_neighbor.items() for protocol in protocols]
+        )
+
+    def __contains__(self, connection: tuple[Protocol, DeviceAgent]) -> bool:
+        protocol, neighbor = connection
+        return protocol in self._by_neighbor.get(neighbor, ())
+
+    def __repr__(self):
+        return f"ConnectionTable({list(self)})"
+
+    def add(self, connection: tuple[Protocol, DeviceAgent]) -> None:
+        protocol, neighbor = connection
+        protocols = self._by_neighbor.setdefault(neighbor, {})
+        if protocol in protocols:
+            return
+        protocols[protocol] = None
+        self._by_protocol.setdefault(protocol, {})[neighbor] = None
+        self._size += 1
+        if self._adjacency is not None:
+            self._adjacency._link(self._device, neighbor)
+
+    def remove(self, connection: tuple[Protocol, DeviceAgent]) -> None:
+        if connection not in self:
+            raise KeyError(connection)
+        self.discard(connection)
+
+    def discard(self, connection: tuple[Protocol, DeviceAgent]) -> None:
+        protocol, neighbor = connection
+        protocols = self._by_neighbor.get(neighbor)
+        if protocols is None or protocol not in protocols:
+            return
+        del protocols[protocol]
+        if not protocols:
+            del self._by_neighbor[neighbor]
+        neighbors = self._by_protocol[protocol]
+        del neighbors[neighbor]
+        if not neighbors:
+            del self._by_protocol[protocol]
+        self._size -= 1
+        if self._adjacency is not None:
+            self._adjacency._unlink(self._device, neighbor)
+
+    def clear(self) -> None:
+        for connection in list(self):
+            self.discard(connection)
+
+    def copy(self) -> set[tuple[Protocol, DeviceAgent]]:
+        return set(self)
+
+    def neighbors(self) -> list[DeviceAgent]:
+        """Returns the devices with at least one connection, in the order they connected."""
+        return list(self._by_neighbor)
+
+    def has_neighbor(self, neighbor: DeviceAgent) -> bool:
+        return neighbor in self._by_neighbor
+
+    def protocol_for(self, neighbor: DeviceAgent) -> Protocol | None:
+        """Returns the protocol of the first connection to a neighbor.
+
+        Args:
+            neighbor (DeviceAgent): The device to look up.
+
+        Returns:
+            Protocol | None: The protocol of the oldest connection to `neighbor`, or None if there is none.
+        """
+        return next(iter(self._by_neighbor.get(neighbor, ())), None)
+
+    def protocols_for(self, neighbor: DeviceAgent) -> list[Protocol]:
+        return list(self._by_neighbor.get(neighbor, ()))
+
+    def neighbors_via(self, protocol: Protocol) -> list[DeviceAgent]:
+        return list(self._by_protocol.get(protocol, ()))
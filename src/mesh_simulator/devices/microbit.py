@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 
 from mesh_simulator.devices import DeviceAgent
 from mesh_simulator.layout.flood import FloodLayout
@@ -10,8 +10,19 @@ from mesh_simulator.routing.flood import FloodRouting
 
 if TYPE_CHECKING:
     from mesh_simulator.model import MeshModel
+    from mesh_simulator.protocols import Protocol
+    from mesh_simulator.routing import RoutingAlgorithm
 
 
 class Microbit(DeviceAgent):
+    protocol_types: list[type[Protocol]] = [BLE, Wifi2G]
+    """The protocols of every Microbit"""
+    scan_interval: int = 300
+    """How many steps between each scan of the FloodLayout"""
+    routing_type: Callable[[DeviceAgent], RoutingAlgorithm] = FloodRouting
+    """The routing algorithm of every Microbit, e.g. DistanceVectorRouting"""
+
     def __init__(self, name: str, model: MeshModel):
-        super().__init__(name, model, [BLE, Wifi2G], lambda d: FloodLayout(d, 300), FloodRouting)
+        super().__init__(
+            name, model, self.protocol_types, lambda d: FloodLayout(d, self.scan_interval), self.routing_type
+        )
@@ -0,0 +1,442 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable
+
+import mesa
+import networkx as nx
+import numpy as np
+
+from mesh_simulator.analysis import metric_from_model
+from mesh_simulator.devices.microbit import Microbit
+from mesh_simulator.mobility import Mobility, MobilityModel, RandomWalk
+from mesh_simulator.model import (ROBUSTNESS_MAX_AGENTS, MeshModel,
+                                  _current_step, topology_metrics)
+from mesh_simulator.profiling import Profiler
+
+if TYPE_CHECKING:
+    from mesh_simulator.analysis.parallel import MetricPool
+    from mesh_simulator.recorder import MetricRecorder
+
+
+def pairs_in_radius(
+    positions: np.ndarray, rows: np.ndarray, radius: int, manhattan: bool = False
+) -> tuple[np.ndarray, np.ndarray]:
+    """Finds all pairs of distinct devices within a given distance, for a subset of the devices.
+
+    The devices are binned into square cells of the radius, so only devices in the 3x3 cells around each queried
+    device are compared.
+
+    Args:
+        positions (np.ndarray): The (x, y) cells of all devices.
+        rows (np.ndarray): The rows of the devices to find the neighbors of.
+        radius (int): The maximum distance of a pair.
+        manhattan (bool, optional): If True, the distance is measured along the grid axes, otherwise it is the
+        euclidean distance. Defaults to False.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The rows of the queried devices and of their neighbors, sorted by both.
+    """
+    size = max(radius, 1)
+    cells = positions // size
+    columns = int(cells[:, 1].max()) + 1 if len(cells) else 1
+    keys = cells[:, 0] * columns + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    sources, targets = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            cx, cy = cells[rows, 0] + dx, cells[rows, 1] + dy
+            neighbor_keys = cx * columns + cy
+            start = np.searchsorted(sorted_keys, neighbor_keys, side="left")
+            end = np.searchsorted(sorted_keys, neighbor_keys, side="right")
+            counts = np.where((cx >= 0) & (cy >= 0) & (cy < columns), end - start, 0)
+            # Expand each queried device into one entry per device of the neighboring cell
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            sources.append(np.repeat(rows, counts))
+            targets.append(order[np.repeat(start, counts) + offsets])
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+
+    delta = positions[sources] - positions[targets]
+    if manhattan:
+        within = np.abs(delta).sum(axis=1) <= radius
+    else:
+        within = (delta**2).sum(axis=1) <= radius**2
+    keep = within & (sources != targets)
+    sources, targets = sources[keep], targets[keep]
+    order = np.lexsort((targets, sources))
+    return sources[order], targets[order]
+
+
+def _no_traffic(model: FastMeshModel) -> int:
+    return 0
+
+
+class DeviceView:
+    __slots__ = ("_model", "_row")
+
+    def __init__(self, model: FastMeshModel, row: int):
+        """A read-only view of one device of a FastMeshModel, used as the node of its topology graph.
+
+        Args:
+            model (FastMeshModel): The model holding the state of the device.
+            row (int): The row of the device in the state arrays.
+        """
+        self._model = model
+        self._row = row
+
+    def __repr__(self):
+        return f"DeviceView({self.name})"
+
+    @property
+    def name(self) -> str:
+        return f"Agent {self._row}"
+
+    @property
+    def pos(self) -> tuple[int, int]:
+        x, y = self._model.positions[self._row].tolist()
+        return x, y
+
+    @property
+    def own_data(self) -> int:
+        return int(self._model.own_data[self._row])
+
+    @property
+    def total_data(self) -> int:
+        return int(self._model.total_data[self._row])
+
+    @property
+    def consumed_energy(self) -> int:
+        return int(self._model.consumed_energy[self._row])
+
+
+class FastMeshModel(mesa.Model):
+    handshake_steps = 3
+    """How many steps of its task queue a handshake takes the initiating device: request, response and establish"""
+    handshake_timeout = 5
+    """How many steps a handshake takes the initiating device if the peer doesn't respond, like HandshakeTask"""
+    handshake_packet_size = 1
+    """The size of each handshake packet"""
+
+    def __init__(
+        self,
+        n_agents,
+        width,
+        height,
+        mobility: MobilityModel | None = None,
+        collect_every: int = 1,
+        profile: bool = False,
+        robustness: bool | None = None,
+        seed=None,
+    ):
+        """A mesh network of Microbit devices like MeshModel, with the state of all devices held in arrays.
+
+        Each step runs the phases of the Microbit's FloodLayout as vectorized operations over all devices:
+
+        - Every `Microbit.scan_interval` steps, a device queues a scan of each of its protocols.
+        - A device only scans while it has no handshakes queued, as scans have the lowest task priority. A scan takes
+          the `scan_duration` of its protocol, consumes its `scan_cost`, and queues a handshake with every device within
+          its scan radius.
+        - Each device works on one queued handshake per step. A handshake with a device it is already connected to
+          fails at once. If the peer has handshakes of its own queued when requested, it can't respond in time, and
+          the handshake fails after `handshake_timeout` steps. All others take `handshake_steps` and connect both
+          devices if they are still in range of the protocol. The peer queues a handshake of its own to respond,
+          which takes it one step less and keeps it busy meanwhile.
+        - Connections that left the range of their protocol are dropped, and the devices move.
+
+        Devices hold at most one connection to each other, through the protocol of the scan that discovered them. No
+        application traffic is simulated, so the transit time and duplicate reporters are always 0, like in a MeshModel
+        without traffic.
+
+        The model collects the same reporters as MeshModel, on a topology graph with DeviceView nodes. As the handshakes
+        are approximated, their values differ from those of a MeshModel with the same parameters: in sparse meshes the
+        number of connections is within about 10%, in dense meshes with long handshake queues it is up to 1.6 times
+        as high. Compare runs of the same model only.
+
+        Args:
+            n_agents (int): The number of devices.
+            width (int): The width of the grid.
+            height (int): The height of the grid.
+            mobility (MobilityModel, optional): How the devices move. Defaults to a RandomWalk with the move probability
+            of the Microbit.
+            collect_every (int, optional): How many steps to wait between collecting data, like MeshModel. Defaults
+            to 1.
+            profile (bool, optional): If True, the model times its phases and reporters with a Profiler, like
+            MeshModel. Its phases are "model.collect", "model.topology", "model.mobility" and "model.<phase>" for each
+            of the phases above, e.g. "model.handshake". Defaults to False.
+            robustness (bool, optional): Whether to report Robustness, like MeshModel. Defaults to reporting it for at
+            most ROBUSTNESS_MAX_AGENTS devices.
+            seed (int, optional): The seed of the random number generator. Must be passed as a keyword, as mesa reads
+            it when creating the model. Defaults to a random seed.
+        """
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.schedule = mesa.time.BaseScheduler(self)
+        protocols = [protocol(None) for protocol in Microbit.protocol_types]
+        self._scan_radius = np.array([protocol.scan_radius for protocol in protocols])
+        self._scan_cost = np.array([protocol.scan_cost for protocol in protocols])
+        self._scan_duration = np.array([protocol.scan_duration for protocol in protocols])
+        self._latency = [protocol.latency for protocol in protocols]
+        self._bandwidth = [protocol.bandwidth for protocol in protocols]
+        self._rng = np.random.default_rng(self.random.getrandbits(64))
+
+        positions = np.column_stack(
+            [self._rng.integers(0, width, n_agents), self._rng.integers(0, height, n_agents)]
+        ).astype(np.int64)
+        self.consumed_energy = np.zeros(n_agents, dtype=np.int64)
+        self.own_data = np.zeros(n_agents, dtype=np.int64)
+        self.total_data = np.zeros(n_agents, dtype=np.int64)
+        # FloodLayout state: the countdown to the next scan, the number of queued scans and the protocol of the next
+        # one, and the protocol (-1 if none) and countdown of the scan in progress
+        self._next_scan = self._rng.integers(0, Microbit.scan_interval, n_agents, endpoint=True)
+        self._queued_scans = np.zeros(n_agents, dtype=np.int64)
+        self._next_scan_protocol = np.zeros(n_agents, dtype=np.int64)
+        self._scan_protocol = np.full(n_agents, -1, dtype=np.int64)
+        self._scan_remaining = np.zeros(n_agents, dtype=np.int64)
+        # Queued handshakes, sorted by device and then in queue order, whether the device responds to each, and the
+        # steps spent on the first of each device
+        self._handshake_device = np.empty(0, dtype=np.int64)
+        self._handshake_peer = np.empty(0, dtype=np.int64)
+        self._handshake_protocol = np.empty(0, dtype=np.int64)
+        self._handshake_responding = np.empty(0, dtype=bool)
+        self._handshake_progress = np.zeros(n_agents, dtype=np.int64)
+        self._handshake_failing = np.zeros(n_agents, dtype=bool)
+        # Connections in both directions, as sorted keys `device * n_agents + peer`, with the protocol of each
+        self._connection_keys = np.empty(0, dtype=np.int64)
+        self._connection_protocol = np.empty(0, dtype=np.int64)
+
+        self.devices = [DeviceView(self, row) for row in range(n_agents)]
+        self.mobility = Mobility(
+            self, self.devices, mobility if mobility is not None else RandomWalk(Microbit.move_probability), positions
+        )
+        self._topology: nx.Graph | None = None
+        self._topology_step = -1
+        self.profiler = Profiler() if profile else None
+        """Times the phases of the simulation if the model was created with `profile=True`, else None"""
+
+        if robustness is None:
+            robustness = n_agents <= ROBUSTNESS_MAX_AGENTS
+        self.topology_metrics = topology_metrics(robustness)
+        """The metrics reported on the topology graph, by the name of their reporter"""
+        reporters = {
+            **{name: metric_from_model(metric) for name, metric in self.topology_metrics.items()},
+            "Average Transit Time": _no_traffic,
+            "Suppressed Duplicates": _no_traffic,
+        }
+        if collect_every > 1:
+            reporters["Step"] = _current_step
+        if self.profiler is not None:
+            reporters = {name: self.profiler.wrap(f"reporter.{name}", reporter) for name, reporter in reporters.items()}
+            reporters.update(self.profiler.reporters("model.collect", "model.topology", *self._phases()))
+        self.datacollector = mesa.DataCollector(model_reporters=reporters)
+        self.recorder: MetricRecorder | None = None
+        """Records each row collected by the datacollector, if set"""
+        self.metric_pool: MetricPool | None = None
+        """Evaluates the topology metrics in worker processes instead of the datacollector, if set"""
+        self.collect_every = collect_every
+        self._next_collection = 0
+        self._collected: deque[tuple[int, dict[str, Any]]] | None = None
+
+    @property
+    def positions(self) -> np.ndarray:
+        """The (x, y) cell of each device"""
+        return self.mobility.positions
+
+    @property
+    def n_agents(self) -> int:
+        return len(self.devices)
+
+    @property
+    def connections(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The established connections in both directions, as arrays of devices, peers and protocol indices"""
+        n = max(self.n_agents, 1)
+        return self._connection_keys // n, self._connection_keys % n, self._connection_protocol
+
+    @property
+    def topology(self) -> nx.Graph:
+        """The topology graph of the current step, like MeshModel.topology."""
+        if self._topology is None or self._topology_step != self.schedule.steps:
+            if self.profiler is None:
+                self._topology = self._build_topology()
+            else:
+                self._topology = self.profiler.call("model.topology", self._build_topology)
+            self._topology_step = self.schedule.steps
+        return self._topology
+
+    def reseed(self, seed: int) -> None:
+        """Reseeds all random number generators of the model, like MeshModel.reseed.
+
+        Args:
+            seed (int): The new seed.
+        """
+        self.reset_randomizer(seed)
+        self.mobility.reseed()
+
+    def step(self):
+        profiler = self.profiler
+        if self.schedule.steps >= self._next_collection:
+            if profiler is None:
+                self._collect()
+            else:
+                profiler.call("model.collect", self._collect)
+        elif self.metric_pool is not None:
+            self.metric_pool.deliver(self)
+        for key, phase in self._phases().items():
+            if profiler is None:
+                phase()
+            else:
+                profiler.call(key, phase)
+
+    def _phases(self) -> dict[str, Callable[[], None]]:
+        return {
+            "model.layout": self._layout,
+            "model.scan": self._scan,
+            "model.handshake": self._handshake,
+            "model.drop_timeout_connections": self._drop_timeout_connections,
+            "model.schedule": self.schedule.step,
+            "model.mobility": self.mobility.step,
+        }
+
+    # Collecting and stepping work the same as for a MeshModel
+    _collect = MeshModel._collect
+    _on_collected = MeshModel._on_collected
+    iter_steps = MeshModel.iter_steps
+
+    def _find_connections(self, devices: np.ndarray, peers: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Returns whether each device is connected to its peer, and the index of the connection if so
+        keys = devices * self.n_agents + peers
+        if not len(self._connection_keys):
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=np.int64)
+        index = np.minimum(np.searchsorted(self._connection_keys, keys), len(self._connection_keys) - 1)
+        return self._connection_keys[index] == keys, index
+
+    def _layout(self) -> None:
+        due = self._next_scan == 0
+        self._queued_scans[due] += len(self._scan_radius)
+        self._next_scan = np.where(due, Microbit.scan_interval, self._next_scan - 1)
+
+    def _scan(self) -> None:
+        # Scans only run while no handshakes are queued
+        busy = np.zeros(self.n_agents, dtype=bool)
+        busy[self._handshake_device] = True
+        start = np.flatnonzero(~busy & (self._scan_protocol < 0) & (self._queued_scans > 0))
+        protocols = self._next_scan_protocol[start]
+        self._scan_protocol[start] = protocols
+        self._scan_remaining[start] = self._scan_duration[protocols]
+        self._next_scan_protocol[start] = (protocols + 1) % len(self._scan_radius)
+        self._queued_scans[start] -= 1
+
+        scanning = ~busy & (self._scan_protocol >= 0)
+        self._scan_remaining[scanning] -= 1
+        done = np.flatnonzero(scanning & (self._scan_remaining <= 0))
+        for protocol in np.unique(self._scan_protocol[done]):
+            devices = done[self._scan_protocol[done] == protocol]
+            self.consumed_energy[devices] += self._scan_cost[protocol]
+            sources, targets = pairs_in_radius(self.positions, devices, self._scan_radius[protocol], manhattan=True)
+            self._queue_handshakes(sources, targets, np.full(len(sources), protocol))
+        self._scan_protocol[done] = -1
+
+    def _queue_handshakes(
+        self, devices: np.ndarray, peers: np.ndarray, protocols: np.ndarray, responding: bool = False
+    ) -> None:
+        # New handshakes go behind the queued ones of the same device, keeping the arrays sorted by device
+        at = np.searchsorted(self._handshake_device, devices, side="right")
+        self._handshake_device = np.insert(self._handshake_device, at, devices)
+        self._handshake_peer = np.insert(self._handshake_peer, at, peers)
+        self._handshake_protocol = np.insert(self._handshake_protocol, at, protocols)
+        self._handshake_responding = np.insert(self._handshake_responding, at, responding)
+
+    def _handshake(self) -> None:
+        if not len(self._handshake_device):
+            return
+        first = np.flatnonzero(np.r_[True, self._handshake_device[1:] != self._handshake_device[:-1]])
+        devices, peers = self._handshake_device[first], self._handshake_peer[first]
+        protocols, responding = self._handshake_protocol[first], self._handshake_responding[first]
+
+        connected, _ = self._find_connections(devices, peers)
+        # A request to a peer that is busy with handshakes of its own is never answered in time
+        starting = ~responding & ~connected & (self._handshake_progress[devices] == 0)
+        busy = np.zeros(self.n_agents, dtype=bool)
+        busy[self._handshake_device] = True
+        self._handshake_failing[devices[starting]] = busy[peers[starting]]
+        self._handshake_progress[devices[~connected]] += 1
+        failing = self._handshake_failing[devices] & ~responding
+        # The responder sends its response and waits for the establish packet, one step less than the initiator
+        duration = np.where(
+            responding, self.handshake_steps - 1, np.where(failing, self.handshake_timeout, self.handshake_steps)
+        )
+        done = ~connected & (self._handshake_progress[devices] >= duration)
+        finished = connected | done
+        self._handshake_progress[devices[finished]] = 0
+        # Answered requests queue the handshake of the responder, which keeps it busy, like HandshakeTask(server=True)
+        answered = starting & ~self._handshake_failing[devices]
+        responders, initiators, responder_protocols = peers[answered], devices[answered], protocols[answered]
+
+        size = self.handshake_packet_size
+        # A failed handshake only sent the request
+        failed = devices[done & failing]
+        np.add.at(self.own_data, failed, size)
+        np.add.at(self.total_data, failed, size)
+        # A completed handshake sent the request and establish packets, and the peer responded
+        completed = done & ~failing & ~responding
+        devices, peers, protocols = devices[completed], peers[completed], protocols[completed]
+        np.add.at(self.own_data, devices, 2 * size)
+        np.add.at(self.total_data, devices, 2 * size)
+        np.add.at(self.own_data, peers, size)
+        np.add.at(self.total_data, peers, size)
+        delta = self.positions[devices] - self.positions[peers]
+        in_range = (delta**2).sum(axis=1) <= self._scan_radius[protocols] ** 2
+        self._connect(devices[in_range], peers[in_range], protocols[in_range])
+
+        keep = np.ones(len(self._handshake_device), dtype=bool)
+        keep[first[finished]] = False
+        self._handshake_device = self._handshake_device[keep]
+        self._handshake_peer = self._handshake_peer[keep]
+        self._handshake_protocol = self._handshake_protocol[keep]
+        self._handshake_responding = self._handshake_responding[keep]
+        self._queue_handshakes(responders, initiators, responder_protocols, responding=True)
+
+    def _connect(self, devices: np.ndarray, peers: np.ndarray, protocols: np.ndarray) -> None:
+        n = self.n_agents
+        keys = np.concatenate([self._connection_keys, devices * n + peers, peers * n + devices])
+        protocols = np.concatenate([self._connection_protocol, protocols, protocols])
+        # Existing connections come first, so they keep their protocol
+        self._connection_keys, index = np.unique(keys, return_index=True)
+        self._connection_protocol = protocols[index]
+
+    def _drop_timeout_connections(self) -> None:
+        devices, peers, protocols = self.connections
+        delta = self.positions[devices] - self.positions[peers]
+        alive = (delta**2).sum(axis=1) <= self._scan_radius[protocols] ** 2
+        self._connection_keys = self._connection_keys[alive]
+        self._connection_protocol = self._connection_protocol[alive]
+
+    def _build_topology(self) -> nx.Graph:
+        # Mirrors build_topology: every pair that could connect is linked, with the latency and bandwidth of the
+        # connection if established, otherwise of the first protocol that could be used
+        g = nx.Graph()
+        g.add_nodes_from(self.devices)
+        sources, targets = pairs_in_radius(self.positions, np.arange(self.n_agents), int(self._scan_radius.max()))
+        lower = sources < targets
+        sources, targets = sources[lower], targets[lower]
+        distances = ((self.positions[sources] - self.positions[targets]) ** 2).sum(axis=1)
+        usable = distances[:, None] <= self._scan_radius[None, :] ** 2
+        first_usable = np.argmax(usable, axis=1)
+
+        connected, index = self._find_connections(sources, targets)
+        protocols = first_usable.copy()
+        protocols[connected] = self._connection_protocol[index[connected]]
+        devices = self.devices
+        g.add_edges_from(
+            (
+                devices[source],
+                devices[target],
+                {"established": established, "latency": self._latency[p], "bandwidth": self._bandwidth[p]},
+            )
+            for source, target, established, p in zip(
+                sources.tolist(), targets.tolist(), connected.tolist(), protocols.tolist()
+            )
+        )
+        return g
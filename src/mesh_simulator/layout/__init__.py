@@ -14,3 +14,20 @@ class LayoutAlgorithm(ABC):
 
     @abstractmethod
     def step(self): ...
+
+    def idle_steps(self) -> float:
+        """Returns how many of the upcoming steps of this algorithm would only count down timers.
+
+        Returns:
+            float: The number of steps that may be skipped using `skip`. Defaults to 0, i.e. the algorithm must be
+            stepped.
+        """
+        return 0
+
+    def skip(self, steps: int):
+        """Advances the timers of the algorithm as if it had been stepped `steps` times while idle.
+
+        Args:
+            steps (int): The number of steps to skip, at most `idle_steps()`.
+        """
+        pass
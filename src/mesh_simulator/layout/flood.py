@@ -17,6 +17,12 @@ class FloodLayout(LayoutAlgorithm):
         """How many steps between each scan"""
         self.next_scan = device.random.randint(0, scan_interval)
 
+    def idle_steps(self) -> float:
+        return self.next_scan
+
+    def skip(self, steps: int):
+        self.next_scan -= steps
+
     def step(self):
         if self.next_scan == 0:
             for protocol in self.device.protocols:
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from mesh_simulator.devices import DeviceAgent
+    from mesh_simulator.model import MeshModel
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_NEIGHBOR_OFFSETS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy], dtype=np.int64)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    # The finalizer of the SplitMix64 generator, a bijective hash of 64 bit integers with good avalanche behaviour
+    x = x + _GOLDEN_GAMMA
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class MobilityModel(ABC):
+    move_probability: float | None = None
+    """The chance of a device moving in each step, or None if devices may move in every step. The event-driven
+    scheduler only supports mobility models that define it."""
+
+    def reset(self, mobility: Mobility) -> None:
+        """Initializes the state of the model for the devices of a Mobility. Called once when the Mobility is created.
+
+        Args:
+            mobility (Mobility): The positions the model advances.
+        """
+        pass
+
+    @abstractmethod
+    def advance(self, mobility: Mobility, step: int, rows: np.ndarray) -> np.ndarray:
+        """Moves some devices by one step, updating `mobility.positions` in place.
+
+        Args:
+            mobility (Mobility): The positions to advance.
+            step (int): The number of the step, which keys the random numbers drawn with `mobility.uniform`.
+            rows (np.ndarray): The rows of the devices to move.
+
+        Returns:
+            np.ndarray: The rows of the devices whose position changed.
+        """
+        ...
+
+    def relocate(self, mobility: Mobility, step: int, rows: np.ndarray) -> np.ndarray:
+        """Moves devices that are known to move in this step, e.g. because the event-driven scheduler drew their move
+        time from `move_probability`. Defaults to `advance`.
+
+        Returns:
+            np.ndarray: The rows of the devices whose position changed.
+        """
+        return self.advance(mobility, step, rows)
+
+
+class Static(MobilityModel):
+    """Devices never move."""
+
+    move_probability = 0.0
+
+    def advance(self, mobility: Mobility, step: int, rows: np.ndarray) -> np.ndarray:
+        return rows[:0]
+
+
+class RandomWalk(MobilityModel):
+    def __init__(self, move_probability: float = 0.1):
+        """In each step, each device moves to a random neighboring cell with the given chance.
+
+        Args:
+            move_probability (float, optional): The chance of moving in each step. Defaults to 0.1.
+        """
+        self.move_probability = move_probability
+
+    def advance(self, mobility: Mobility, step: int, rows: np.ndarray) -> np.ndarray:
+        return self.relocate(mobility, step, rows[mobility.uniform(rows, step, 0) < self.move_probability])
+
+    def relocate(self, mobility: Mobility, step: int, rows: np.ndarray) -> np.ndarray:
+        candidates = mobility.positions[rows, None, :] + _NEIGHBOR_OFFSETS[None, :, :]
+        valid = (
+            (candidates[:, :, 0] >= 0)
+            & (candidates[:, :, 0] < mobility.width)
+            & (candidates[:, :, 1] >= 0)
+            & (candidates[:, :, 1] < mobility.height)
+        )
+        # Pick one of the neighboring cells inside the grid uniformly at random
+        counts = valid.sum(axis=1)
+        choice = (mobility.uniform(rows, step, 1) * counts).astype(np.int64)
+        picked = np.argmax(np.cumsum(valid, axis=1) > choice[:, None], axis=1)
+        has_neighbors = counts > 0
+        rows, candidates, picked = rows[has_neighbors], candidates[has_neighbors], picked[has_neighbors]
+        mobility.positions[rows] = candidates[np.arange(len(rows)), picked]
+        return rows
+
+
+class RandomWaypoint(MobilityModel):
+    def __init__(self, speed: int = 1):
+        """Each device heads for a random cell of the grid, moving up to `speed` cells along each axis per step, and
+        picks a new random cell once it arrives.
+
+        Args:
+            speed (int, optional): The number of cells a device may move along each axis in one step. Defaults to 1.
+        """
+        self.speed = speed
+        self._targets = np.empty((0, 2), dtype=np.int64)
+
+    def reset(self, mobility: Mobility) -> None:
+        self._targets = mobility.positions.copy()
+
+    def advance(self, mobility: Mobility, step: int, rows: np.ndarray) -> np.ndarray:
+        positions = mobility.positions[rows]
+        targets = self._targets[rows]
+        arrived = (positions == targets).all(axis=1)
+        if arrived.any():
+            arrived_rows = rows[arrived]
+            targets[arrived, 0] = (mobility.uniform(arrived_rows, step, 0) * mobility.width).astype(np.int64)
+            targets[arrived, 1] = (mobility.uniform(arrived_rows, step, 1) * mobility.height).astype(np.int64)
+            self._targets[rows] = targets
+        delta = np.clip(targets - positions, -self.speed, self.speed)
+        moved = (delta != 0).any(axis=1)
+        mobility.positions[rows] = positions + delta
+        return rows[moved]
+
+
+class Mobility:
+    def __init__(
+        self,
+        model: MeshModel,
+        devices: list[DeviceAgent],
+        mobility_model: MobilityModel,
+        positions: np.ndarray | None = None,
+    ):
+        """Keeps the positions of all devices in one array and moves them in batches.
+
+        Random numbers are drawn from a counter-based generator keyed by the device, the step and the draw, so every
+        device has its own reproducible stream: the movement of a device does not depend on the order in which devices
+        are moved, nor on how many other devices there are. The key is derived from the model's random number
+        generator, so runs with the same seed move the same way.
+
+        After each step, the grid of the model is updated for the devices that moved. Devices must not be moved on the
+        grid by other means, as their next move starts from the position held here.
+
+        Args:
+            model (MeshModel): The model whose grid holds the devices.
+            devices (list[DeviceAgent]): The devices to move, which must already be placed on the grid.
+            mobility_model (MobilityModel): How the devices move.
+            positions (np.ndarray, optional): The initial (x, y) cells of the devices, for models without a grid. The
+            array is used as is, the `width` and `height` of the model bound the positions, and no grid is synced.
+            Defaults to the positions of the devices on the grid of the model.
+        """
+        self.model = model
+        self.devices = list(devices)
+        self.mobility_model = mobility_model
+        if positions is None:
+            self._grid = model.grid
+            self.width, self.height = model.grid.width, model.grid.height
+            positions = np.array([device.pos for device in self.devices], dtype=np.int64).reshape(-1, 2)
+        else:
+            self._grid = None
+            self.width, self.height = model.width, model.height
+        self.positions = positions
+        """The (x, y) cell of each device, in the order of `devices`"""
+        self._rows = {device: row for row, device in enumerate(self.devices)}
+        self._all_rows = np.arange(len(self.devices))
+        self.reseed()
+        self.mobility_model.reset(self)
+
+    def reseed(self) -> None:
+        """Derives a new key for the random numbers from the model's random number generator, e.g. after reseeding
+        it."""
+        self._key = _splitmix64(np.array([self.model.random.getrandbits(64)], dtype=np.uint64))
+
+    @property
+    def move_probability(self) -> float | None:
+        return self.mobility_model.move_probability
+
+    def uniform(self, rows: np.ndarray, step: int, draw: int) -> np.ndarray:
+        """Draws one uniform random number in [0, 1) for each of the given devices.
+
+        Args:
+            rows (np.ndarray): The rows of the devices.
+            step (int): The step to draw for.
+            draw (int): The number of the draw within the step, to draw several independent numbers per step.
+
+        Returns:
+            np.ndarray: The random numbers, a pure function of the device, step, draw and the key of this Mobility.
+        """
+        x = _splitmix64(self._key ^ rows.astype(np.uint64))
+        x = _splitmix64(x ^ np.uint64(step))
+        x = _splitmix64(x ^ np.uint64(draw))
+        return (x >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+    def step(self) -> None:
+        """Moves all devices by one step."""
+        self._sync(self.mobility_model.advance(self, self.model.schedule.steps, self._all_rows))
+
+    def move(self, device: DeviceAgent, step: int) -> None:
+        """Moves a single device that is known to move in a step, for the move events of the event-driven scheduler.
+
+        Args:
+            device (DeviceAgent): The device to move.
+            step (int): The step in which the device moves.
+        """
+        self._sync(self.mobility_model.relocate(self, step, np.array([self._rows[device]])))
+
+    def _sync(self, rows: np.ndarray) -> None:
+        grid = self._grid
+        if grid is None:
+            return
+        for row, (x, y) in zip(rows.tolist(), self.positions[rows].tolist()):
+            grid.move_agent(self.devices[row], (x, y))
@@ -1,55 +1,242 @@
 from __future__ import annotations
 
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
 import mesa
+import networkx as nx
 
-from mesh_simulator.analysis import metric_from_model
+from mesh_simulator.analysis import build_topology, metric_from_model
 from mesh_simulator.analysis.metrics import (bandwidth, evaluate_large,
                                              evaluate_small, fairness, latency,
                                              power, reachability, robustness)
+from mesh_simulator.devices.connections import Adjacency
 from mesh_simulator.devices.microbit import Microbit
+from mesh_simulator.mobility import Mobility, RandomWalk
+from mesh_simulator.packets.sink import PacketSink
+from mesh_simulator.profiling import Profiler
+from mesh_simulator.space import MeshGrid
 from mesh_simulator.tasks.scan import ScanTask
+from mesh_simulator.time import EventActivation
+
+if TYPE_CHECKING:
+    from mesh_simulator.analysis.parallel import MetricPool
+    from mesh_simulator.recorder import MetricRecorder
+
+
+TOPOLOGY_METRICS = {
+    "Reachability": reachability,
+    "Routing Efficiency": latency,
+    "Power Efficiency": power,
+    "Fairness": fairness,
+    "Robustness": robustness,
+    "Bandwidth Efficiency": bandwidth,
+    "Overall Evaluation": evaluate_small,
+}
+"""The metrics computed on the topology graph, by the name of their model reporter"""
+
+ROBUSTNESS_MAX_AGENTS = 50
+"""The largest number of devices for which models report Robustness unless told otherwise. Robustness runs one
+max-flow per device on both the topology and the established graph, so it soon dominates each step: with 80 devices
+it takes about 700ms, against about 1ms for stepping the devices."""
+
+
+def topology_metrics(robustness: bool = True) -> dict[str, Callable[[nx.Graph], float]]:
+    """Returns the metrics a model reports on its topology graph.
+
+    Args:
+        robustness (bool, optional): Whether to include Robustness. Without it, the Overall Evaluation is computed by
+        `evaluate_large`, which leaves out robustness and bandwidth. Defaults to True.
+
+    Returns:
+        dict[str, Callable[[nx.Graph], float]]: The metrics, by the name of their model reporter.
+    """
+    if robustness:
+        return dict(TOPOLOGY_METRICS)
+    metrics = {name: metric for name, metric in TOPOLOGY_METRICS.items() if name != "Robustness"}
+    metrics["Overall Evaluation"] = evaluate_large
+    return metrics
+
+MODEL_PHASES = ("model.collect", "model.schedule", "model.mobility", "model.topology")
+"""The phases of a model step whose total seconds are reported when profiling, see Profiler"""
+
+
+# The reporters are module-level functions, so that models can be pickled, see mesh_simulator.checkpoint
+def _average_transit_time(model: MeshModel) -> float:
+    return model.packet_sink.average_transit_time(model.schedule.steps)
+
+
+def _suppressed_duplicates(model: MeshModel) -> int:
+    return sum(agent.routing_algorithm.suppressed_duplicates for agent in model.schedule.agents)
+
+
+def _current_step(model: MeshModel) -> int:
+    return model.schedule.steps
 
 
 class MeshModel(mesa.Model):
-    def __init__(self, n_agents, width, height):
+    def __init__(
+        self,
+        n_agents,
+        width,
+        height,
+        event_driven=False,
+        mobility=None,
+        collect_every=1,
+        profile=False,
+        robustness=None,
+        seed=None,
+    ):
+        """A mesh network of Microbit devices, placed at random on a grid.
+
+        Args:
+            n_agents (int): The number of devices.
+            width (int): The width of the grid.
+            height (int): The height of the grid.
+            event_driven (bool, optional): If True, devices are scheduled with EventActivation, and each step jumps
+            straight to the next step on which any device has something to do. Data is then only collected on these
+            steps, and the "Step" column holds the step number of each row. Defaults to False.
+            mobility (MobilityModel, optional): How the devices move. All devices are moved at once after each step,
+            or by move events when event driven, which requires a mobility model with a move probability. Defaults
+            to a RandomWalk with the move probability of the devices.
+            collect_every (int, optional): How many steps to wait between collecting data. If greater than 1, the
+            "Step" column holds the step number of each row. Defaults to 1.
+            profile (bool, optional): If True, the model times the phases of its steps, of the steps of its devices and
+            of its reporters with a Profiler, see `profiler`, and reports the total seconds of each phase of its step.
+            Defaults to False.
+            robustness (bool, optional): Whether to report Robustness, see ROBUSTNESS_MAX_AGENTS for its cost. Defaults
+            to reporting it for at most ROBUSTNESS_MAX_AGENTS devices.
+            seed (int, optional): The seed of the random number generator. Must be passed as a keyword, as mesa reads
+            it when creating the model. Defaults to a random seed.
+        """
         super().__init__()
-        self.schedule = mesa.time.RandomActivation(self)
-        self.grid = mesa.space.MultiGrid(width, height, torus=False)
+        self.schedule = EventActivation(self) if event_driven else mesa.time.RandomActivation(self)
+        self.grid = MeshGrid(width, height, torus=False)
+        self.adjacency = Adjacency()
+        self.packet_sink = PacketSink(window=10)
+        """Records the packets delivered to any device"""
+        self._topology: nx.Graph | None = None
+        self._topology_step = -1
+        self.profiler = Profiler() if profile else None
+        """Times the phases of the simulation if the model was created with `profile=True`, else None"""
         for i in range(n_agents):
             a = Microbit(f"Agent {i}", self)
             self.schedule.add(a)
             coords = (self.random.randrange(0, self.grid.width), self.random.randrange(0, self.grid.height))
             self.grid.place_agent(a, coords)
+        if mobility is None:
+            mobility = RandomWalk(Microbit.move_probability)
+        if event_driven and mobility.move_probability is None:
+            raise ValueError(f"{type(mobility).__name__} can't be used with the event-driven scheduler")
+        self.mobility = Mobility(self, self.schedule.agents, mobility)
 
-        def avg_transit_time(model):
-            total_time = 0
-            total_packets = 0
-            for agent in model.schedule.agents:
-                for step in range(model.schedule.steps - 10, model.schedule.steps):
-                    if step not in agent.received_packets:
-                        continue
-                    total_packets += len(agent.received_packets[step])
-                    total_time += sum(p.initial_ttl - p.ttl for p in agent.received_packets[step])
-            if total_packets == 0:
-                return 0
-            return total_time / total_packets
-
+        if robustness is None:
+            robustness = n_agents <= ROBUSTNESS_MAX_AGENTS
+        self.topology_metrics = topology_metrics(robustness)
+        """The metrics reported on the topology graph, by the name of their reporter"""
         reporters = {
-            "Reachability": metric_from_model(reachability),
-            "Routing Efficiency": metric_from_model(latency),
-            "Power Efficiency": metric_from_model(power),
-            "Fairness": metric_from_model(fairness),
-            "Overall Evaluation": metric_from_model(evaluate_large),
-            "Average Transit Time": avg_transit_time,
+            **{name: metric_from_model(metric) for name, metric in self.topology_metrics.items()},
+            "Average Transit Time": _average_transit_time,
+            "Suppressed Duplicates": _suppressed_duplicates,
         }
-
-        if n_agents < 10:
-            reporters["Bandwidth Efficiency"] = metric_from_model(bandwidth)
-            reporters["Robustness"] = metric_from_model(robustness)
-            reporters["Overall Evaluation"] = metric_from_model(evaluate_small)
+        if event_driven or collect_every > 1:
+            reporters["Step"] = _current_step
+        if self.profiler is not None:
+            reporters = {name: self.profiler.wrap(f"reporter.{name}", reporter) for name, reporter in reporters.items()}
+            reporters.update(self.profiler.reporters(*MODEL_PHASES))
 
         self.datacollector = mesa.DataCollector(model_reporters=reporters)
+        self.recorder: MetricRecorder | None = None
+        """Records each row collected by the datacollector, if set"""
+        self.metric_pool: MetricPool | None = None
+        """Evaluates the topology metrics in worker processes instead of the datacollector, if set"""
+        self.collect_every = collect_every
+        self._next_collection = 0
+        self._collected: deque[tuple[int, dict[str, Any]]] | None = None
+
+    @property
+    def topology(self) -> nx.Graph:
+        """The topology graph of the current step.
+
+        The graph is built on first access in each step and shared by all metric reporters, so they must not modify it.
+        """
+        if self._topology is None or self._topology_step != self.schedule.steps:
+            if self.profiler is None:
+                self._topology = build_topology(self)
+            else:
+                self._topology = self.profiler.call("model.topology", build_topology, self)
+            self._topology_step = self.schedule.steps
+        return self._topology
+
+    def reseed(self, seed: int) -> None:
+        """Reseeds all random number generators of the model, so that copies of it diverge from each other, e.g. the
+        forks of a checkpoint.
+
+        Args:
+            seed (int): The new seed.
+        """
+        self.reset_randomizer(seed)
+        self.mobility.reseed()
 
     def step(self):
-        self.datacollector.collect(self)
-        self.schedule.step()
+        profiler = self.profiler
+        if self.schedule.steps >= self._next_collection:
+            if profiler is None:
+                self._collect()
+            else:
+                profiler.call("model.collect", self._collect)
+        elif self.metric_pool is not None:
+            self.metric_pool.deliver(self)
+        if profiler is None:
+            self.schedule.step()
+        else:
+            profiler.call("model.schedule", self.schedule.step)
+        if not isinstance(self.schedule, EventActivation):
+            if profiler is None:
+                self.mobility.step()
+            else:
+                profiler.call("model.mobility", self.mobility.step)
+
+    def _collect(self):
+        self._next_collection = self.schedule.steps + self.collect_every
+        if self.profiler is not None:
+            # Builds the topology graph up front, so that it isn't timed as part of the first reporter
+            _ = self.topology
+        if self.metric_pool is None:
+            self.datacollector.collect(self)
+            self._on_collected(self.schedule.steps)
+        else:
+            self.metric_pool.submit(self)
+            self.metric_pool.deliver(self)
+
+    def _on_collected(self, step: int):
+        # Called whenever a row was appended to the datacollector, which may be steps after it was collected
+        if self._collected is not None:
+            self._collected.append(
+                (step, {name: values[-1] for name, values in self.datacollector.model_vars.items() if name != "Step"})
+            )
+        if self.recorder is not None:
+            self.recorder.record(self, step)
+
+    def iter_steps(self, steps: int) -> Iterator[tuple[int, dict[str, Any]]]:
+        """Steps the model until it reaches the given step, yielding every row of metrics as soon as it is collected,
+        or as soon as the `metric_pool` delivers it. Waits for the rows outstanding in the pool before returning.
+
+        Args:
+            steps (int): The step at which to stop.
+
+        Yields:
+            tuple[int, dict[str, Any]]: The step at which the row was collected, and the metrics of the row.
+        """
+        self._collected = deque()
+        try:
+            while self.schedule.steps < steps:
+                self.step()
+                while self._collected:
+                    yield self._collected.popleft()
+            if self.metric_pool is not None:
+                self.metric_pool.deliver(self, wait=True)
+                while self._collected:
+                    yield self._collected.popleft()
+        finally:
+            self._collected = None
@@ -1,20 +1,37 @@
 from __future__ import annotations
 
+import itertools
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from mesh_simulator.devices import DeviceAgent
 
 
+_ids = itertools.count()
+
+
+def _reserve_ids(start: int) -> None:
+    # Makes sure that packets created from now on get ids of at least `start`, e.g. after loading a checkpoint
+    global _ids
+    _ids = itertools.count(max(start, next(_ids)))
+
+
 class Packet:
+    __slots__ = ("_id", "_source", "_destination", "_size_estimate", "_ttl", "_initial_ttl")
 
     def __init__(self, source: DeviceAgent, destination: DeviceAgent, size_estimate: int, ttl: int = 30):
+        self._id = next(_ids)
         self._source = source
         self._destination = destination
         self._size_estimate = size_estimate
         self._ttl = ttl
         self._initial_ttl = ttl
 
+    @property
+    def id(self) -> int:
+        """An identifier of the packet that is unique within the process and shared by all of its copies"""
+        return self._id
+
     @property
     def size_estimate(self):
         return self._size_estimate
@@ -35,5 +52,27 @@ class Packet:
     def initial_ttl(self):
         return self._initial_ttl
 
-    def with_ttl(self, ttl: int):
-        return Packet(self.source, self.destination, self.size_estimate, ttl)
+    def _copy(self) -> Packet:
+        # Copies the slots without going through __init__. Subclasses with additional slots must extend this.
+        packet = object.__new__(type(self))
+        packet._id = self._id
+        packet._source = self._source
+        packet._destination = self._destination
+        packet._size_estimate = self._size_estimate
+        packet._ttl = self._ttl
+        packet._initial_ttl = self._initial_ttl
+        return packet
+
+    def with_ttl(self, ttl: int) -> Packet:
+        """Returns a copy of the packet with another TTL, e.g. when forwarding it. The copy has the same type, id and
+        initial TTL as the packet, so the number of hops it took can still be determined.
+
+        Args:
+            ttl (int): The TTL of the copy.
+
+        Returns:
+            Packet: The copy.
+        """
+        packet = self._copy()
+        packet._ttl = ttl
+        return packet
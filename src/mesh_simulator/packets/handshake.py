@@ -12,6 +12,8 @@ class HandshakePacketType(Enum):
 
 
 class HandshakePacket(Packet):
+    __slots__ = ("_state",)
+
     def __init__(self, source, destination, state: HandshakePacketType):
         super().__init__(source, destination, 1)
         self._state = state
@@ -20,5 +22,10 @@ class HandshakePacket(Packet):
     def state(self):
         return self._state
 
+    def _copy(self) -> HandshakePacket:
+        packet = super()._copy()
+        packet._state = self._state
+        return packet
+
     def __str__(self):
         return f"HandshakePacket({self.state})"
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from mesh_simulator.packets import Packet
+
+if TYPE_CHECKING:
+    from mesh_simulator.devices import DeviceAgent
+
+
+class RouteAdvertisement(Packet):
+    __slots__ = ("_routes",)
+
+    def __init__(self, source: DeviceAgent, destination: DeviceAgent, routes: tuple[tuple[DeviceAgent, int], ...]):
+        """The routing table a device sends to a neighbor, as (destination, hops) pairs. The neighbor itself is
+        reachable in one hop, so it isn't listed.
+        """
+        super().__init__(source, destination, len(routes) + 1, ttl=1)
+        self._routes = routes
+
+    @property
+    def routes(self) -> tuple[tuple[DeviceAgent, int], ...]:
+        return self._routes
+
+    def _copy(self) -> RouteAdvertisement:
+        packet = super()._copy()
+        packet._routes = self._routes
+        return packet
+
+    def __str__(self):
+        return f"RouteAdvertisement({len(self._routes)} routes)"
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterator
+
+from mesh_simulator.packets import Packet
+
+
+class PacketSink:
+    def __init__(self, capacity: int = 64, window: int = 10, parent: PacketSink | None = None):
+        """Records delivered packets in bounded memory.
+
+        The sink keeps the most recent packets in a ring buffer, and the number of packets and the sum of their
+        transit times (hops, i.e. `initial_ttl - ttl`) of each of the last `window` steps in ring buffers of running
+        sums, so that memory stays flat however long the simulation runs.
+
+        Args:
+            capacity (int, optional): How many of the most recent packets to keep. Defaults to 64.
+            window (int, optional): How many steps the transit time statistics cover. Defaults to 10.
+            parent (PacketSink, optional): A sink that also records every packet recorded by this one, e.g. the sink
+            of the whole model. Defaults to None.
+        """
+        if window < 1:
+            raise ValueError("The window must cover at least one step")
+        self.window = window
+        self.parent = parent
+        self.total_packets = 0
+        """The number of packets recorded since the sink was created"""
+        self._recent: deque[tuple[int, Packet]] = deque(maxlen=capacity)
+        self._steps = [-1] * window
+        self._counts = [0] * window
+        self._transit_times = [0] * window
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def __iter__(self) -> Iterator[tuple[int, Packet]]:
+        """Iterates over the most recent packets as (step, packet) pairs, oldest first."""
+        return iter(self._recent)
+
+    def record(self, step: int, packet: Packet) -> None:
+        """Records a packet delivered in a step.
+
+        Args:
+            step (int): The step in which the packet was delivered. Steps must not decrease between calls.
+            packet (Packet): The delivered packet.
+        """
+        self._recent.append((step, packet))
+        self.total_packets += 1
+        slot = step % self.window
+        if self._steps[slot] != step:
+            self._steps[slot] = step
+            self._counts[slot] = 0
+            self._transit_times[slot] = 0
+        self._counts[slot] += 1
+        self._transit_times[slot] += packet.initial_ttl - packet.ttl
+        if self.parent is not None:
+            self.parent.record(step, packet)
+
+    def packets(self, step: int) -> int:
+        """Returns the number of packets delivered in the `window` steps before a step.
+
+        Args:
+            step (int): The current step, which is not included.
+        """
+        return sum(
+            count for slot_step, count in zip(self._steps, self._counts) if step - self.window <= slot_step < step
+        )
+
+    def average_transit_time(self, step: int) -> float:
+        """Returns the average transit time of the packets delivered in the `window` steps before a step.
+
+        Args:
+            step (int): The current step, which is not included.
+
+        Returns:
+            float: The average number of hops, or 0 if no packets were delivered.
+        """
+        packets = 0
+        transit_time = 0
+        for slot_step, count, slot_transit_time in zip(self._steps, self._counts, self._transit_times):
+            if step - self.window <= slot_step < step:
+                packets += count
+                transit_time += slot_transit_time
+        if packets == 0:
+            return 0
+        return transit_time / packets
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import time
+from functools import partial
+from typing import Any, Callable
+
+
+class Profiler:
+    def __init__(self):
+        """Accumulates the wall time and number of calls of the phases of a simulation, by key.
+
+        A model created with `profile=True` holds a Profiler as its `profiler`, and times with it:
+
+        - the phases of its step as "model.collect", "model.schedule" and "model.mobility", and building the topology
+          graph as "model.topology",
+        - each metric reporter as "reporter.<name>", which excludes building the topology graph. Metrics evaluated by
+          a MetricPool are timed in the worker processes and added once their row is delivered,
+        - the phases of `DeviceAgent.step` as "device.<phase>", e.g. "device.layout" or "device.tasks",
+        - the steps of each task type as "task.<type>", e.g. "task.ScanTask", which are part of "device.tasks".
+
+        Without a profiler, models and devices skip all timing, so profiling costs nothing unless enabled.
+        """
+        self._seconds: dict[str, float] = {}
+        self._calls: dict[str, int] = {}
+
+    def call(self, key: str, fn: Callable[..., Any], *args) -> Any:
+        """Calls a function and adds the time it took to a key.
+
+        Args:
+            key (str): The key to account the time to.
+            fn (Callable[..., Any]): The function to call.
+            *args: The arguments of the function.
+
+        Returns:
+            Any: What the function returned.
+        """
+        start = time.perf_counter()
+        result = fn(*args)
+        self._seconds[key] = self._seconds.get(key, 0.0) + time.perf_counter() - start
+        self._calls[key] = self._calls.get(key, 0) + 1
+        return result
+
+    def add(self, key: str, seconds: float, calls: int = 1) -> None:
+        """Adds time that was measured elsewhere to a key, e.g. in a worker process.
+
+        Args:
+            key (str): The key to account the time to.
+            seconds (float): The seconds to add.
+            calls (int, optional): The number of calls the time was spent in. Defaults to 1.
+        """
+        self._seconds[key] = self._seconds.get(key, 0.0) + seconds
+        self._calls[key] = self._calls.get(key, 0) + calls
+
+    def wrap(self, key: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Returns a picklable function that calls `fn` and adds the time it took to a key, e.g. to time a reporter."""
+        return partial(self.call, key, fn)
+
+    def seconds(self, key: str) -> float:
+        """Returns the total seconds accounted to a key, 0 if it was never timed."""
+        return self._seconds.get(key, 0.0)
+
+    def calls(self, key: str) -> int:
+        """Returns the number of calls timed for a key."""
+        return self._calls.get(key, 0)
+
+    def stats(self) -> dict[str, tuple[int, float]]:
+        """Returns the number of calls and total seconds of each key, slowest first."""
+        return {
+            key: (self._calls[key], seconds)
+            for key, seconds in sorted(self._seconds.items(), key=lambda item: item[1], reverse=True)
+        }
+
+    def reporters(self, *keys: str) -> dict[str, Callable[[Any], float]]:
+        """Returns model reporters of the total seconds of each key, named "<key> Seconds".
+
+        Args:
+            *keys (str): The keys to report.
+        """
+        return {f"{key} Seconds": partial(_seconds, self, key) for key in keys}
+
+    def reset(self) -> None:
+        """Forgets all times and calls, e.g. after a warm-up."""
+        self._seconds.clear()
+        self._calls.clear()
+
+    def summary(self) -> str:
+        """Returns a table of the calls, total time and time per call of each key, slowest first."""
+        stats = self.stats()
+        width = max((len(key) for key in stats), default=3)
+        lines = [f"{'Key':<{width}}  {'Calls':>10}  {'Total (s)':>10}  {'Per call (us)':>13}"]
+        for key, (calls, seconds) in stats.items():
+            lines.append(f"{key:<{width}}  {calls:>10}  {seconds:>10.3f}  {seconds / calls * 1e6:>13.1f}")
+        return "\n".join(lines)
+
+
+def _seconds(profiler: Profiler, key: str, model: Any) -> float:
+    return profiler.seconds(key)
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import os
+import zipfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from mesh_simulator.fast import FastMeshModel
+    from mesh_simulator.model import MeshModel
+
+    Model = Union[MeshModel, FastMeshModel]
+
+FORMATS = ("parquet", "npz")
+TABLES = ("metrics", "agents")
+AGENT_COUNTERS = {"Consumed Energy": "consumed_energy", "Own Data": "own_data", "Total Data": "total_data"}
+"""The per-agent counters recorded with `agent_counters=True`, by the name of their column"""
+
+
+def _parquet():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow.parquet
+
+
+def _chunk_files(path: Path, table: str) -> list[Path]:
+    return sorted(file for file in path.glob(f"{table}-*.*") if file.suffix[1:] in FORMATS)
+
+
+class MetricRecorder:
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        chunk_size: int = 1024,
+        agent_counters: bool = False,
+        history: int | None = 1,
+        file_format: str | None = None,
+    ):
+        """Streams the model variables collected in each step to a directory of columnar chunk files, so that long
+        runs neither grow in memory nor lose their metrics on a crash.
+
+        Set the recorder as the `recorder` of a MeshModel or FastMeshModel, which then records each row after it is
+        collected. Every `chunk_size` rows are written to a new file `metrics-<n>.parquet`, or `metrics-<n>.npz` if
+        pyarrow isn't installed, so only the last unfinished chunk is lost if the process dies. Call `close` (or use the
+        recorder as a context manager) to write it at the end of the run. Read the files back with `read` or
+        `iter_chunks`.
+
+        Args:
+            path (str | os.PathLike): The directory to write the chunks to. Created if missing, and must not hold
+            chunks of an earlier run.
+            chunk_size (int, optional): How many steps each chunk holds. Defaults to 1024.
+            agent_counters (bool, optional): Whether to also record the AGENT_COUNTERS of every device in each step,
+            to the table "agents". Its "Agent" column is the index of the device in `model.mobility.devices`. Defaults
+            to False.
+            history (int | None, optional): How many rows to keep in the DataCollector of the model after recording
+            them, or None to keep all. Defaults to 1, which is all that `iter_steps` needs.
+            file_format (str, optional): One of FORMATS. Defaults to "parquet" if pyarrow is installed, else "npz".
+
+        Raises:
+            ValueError: If the format is unknown or unavailable, or the directory already holds chunks.
+        """
+        if file_format is None:
+            file_format = "parquet" if _parquet() is not None else "npz"
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown format {file_format!r}, expected one of {', '.join(FORMATS)}")
+        if file_format == "parquet" and _parquet() is None:
+            raise ValueError("Writing parquet files requires pyarrow")
+        if chunk_size < 1:
+            raise ValueError("Each chunk must hold at least one step")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        if any(_chunk_files(self.path, table) for table in TABLES):
+            raise ValueError(f"{self.path} already holds recorded chunks")
+        self.chunk_size = chunk_size
+        self.agent_counters = agent_counters
+        self.history = history
+        self.file_format = file_format
+        self.steps = 0
+        """The number of steps recorded so far"""
+        self._chunks = 0
+        self._metrics: dict[str, list] = {}
+        self._agents: list[dict[str, np.ndarray]] = []
+
+    def __enter__(self) -> MetricRecorder:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def record(self, model: Model, step: int | None = None) -> None:
+        """Records the row of model variables the DataCollector of a model collected last.
+
+        Args:
+            model (MeshModel | FastMeshModel): The model, right after a row was appended to its DataCollector.
+            step (int, optional): The step the row was collected in. Defaults to the current step of the model.
+        """
+        if step is None:
+            step = model.schedule.steps
+        model_vars = model.datacollector.model_vars
+        if not self._metrics:
+            self._metrics = {"Step": [], **{name: [] for name in model_vars if name != "Step"}}
+        self._metrics["Step"].append(step)
+        for name, values in model_vars.items():
+            if name != "Step":
+                self._metrics[name].append(values[-1])
+            if self.history is not None and len(values) > self.history:
+                del values[: -self.history]
+        if self.agent_counters:
+            self._agents.append(self._agent_counters(model, step))
+        self.steps += 1
+        if len(self._metrics["Step"]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the rows recorded since the last chunk to a new chunk, if there are any."""
+        if not self._metrics or not self._metrics["Step"]:
+            return
+        self._write(
+            "metrics",
+            {
+                name: np.asarray(values, dtype=np.int64 if name == "Step" else np.float64)
+                for name, values in self._metrics.items()
+            },
+        )
+        if self._agents:
+            self._write(
+                "agents", {name: np.concatenate([step[name] for step in self._agents]) for name in self._agents[0]}
+            )
+        self._chunks += 1
+        self._metrics = {name: [] for name in self._metrics}
+        self._agents = []
+
+    def close(self) -> None:
+        """Writes the last chunk. The recorder may still be used afterwards."""
+        self.flush()
+
+    @staticmethod
+    def _agent_counters(model: Model, step: int) -> dict[str, np.ndarray]:
+        devices = model.mobility.devices
+        counters = {"Step": np.full(len(devices), step, dtype=np.int64), "Agent": np.arange(len(devices))}
+        for name, attribute in AGENT_COUNTERS.items():
+            values = getattr(model, attribute, None)
+            if isinstance(values, np.ndarray):
+                # The FastMeshModel already holds the counters of all devices in arrays
+                counters[name] = values.copy()
+            else:
+                counters[name] = np.fromiter(
+                    (getattr(device, attribute) for device in devices), dtype=np.int64, count=len(devices)
+                )
+        return counters
+
+    def _write(self, table: str, columns: dict[str, np.ndarray]) -> None:
+        file = self.path / f"{table}-{self._chunks:05d}.{self.file_format}"
+        # Write to a temporary file first, so that a crash never leaves a partial chunk behind
+        partial = file.with_name(file.name + ".partial")
+        if self.file_format == "parquet":
+            import pyarrow as pa
+
+            _parquet().write_table(pa.table(columns), partial)
+        else:
+            with open(partial, "wb") as output:
+                # Uncompressed, so that the arrays can be memory mapped when reading
+                np.savez(output, **columns)
+        os.replace(partial, file)
+
+
+def _memory_map_npz(file: Path) -> dict[str, np.ndarray]:
+    columns = {}
+    with zipfile.ZipFile(file) as archive, open(file, "rb") as raw:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{file} holds the compressed array {info.filename}, which can't be memory mapped")
+            # Skip the local file header, which has a fixed size of 30 bytes plus the name and extra field
+            raw.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(raw.read(4), dtype="<u2")
+            raw.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+            version = np.lib.format.read_magic(raw)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(raw)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(raw)
+            order = "F" if fortran_order else "C"
+            columns[info.filename[: -len(".npy")]] = np.memmap(
+                file, dtype=dtype, mode="r", offset=raw.tell(), shape=shape, order=order
+            )
+    return columns
+
+
+def iter_chunks(path: str | os.PathLike, table: str = "metrics") -> Iterator[dict[str, np.ndarray]]:
+    """Iterates over the chunks a MetricRecorder wrote, without loading more than one chunk at a time.
+
+    The columns are memory mapped, so only the parts of them that are accessed are read from disk.
+
+    Args:
+        path (str | os.PathLike): The directory of the recorder.
+        table (str, optional): One of TABLES. Defaults to "metrics".
+
+    Yields:
+        dict[str, np.ndarray]: The columns of each chunk, in the order they were written.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unknown table {table!r}, expected one of {', '.join(TABLES)}")
+    for file in _chunk_files(Path(path), table):
+        if file.suffix == ".parquet":
+            chunk = _parquet().read_table(file, memory_map=True)
+            yield {name: column.to_numpy() for name, column in zip(chunk.column_names, chunk.columns)}
+        else:
+            yield _memory_map_npz(file)
+
+
+def read(path: str | os.PathLike, table: str = "metrics", columns: list[str] | None = None) -> pd.DataFrame:
+    """Reads the chunks a MetricRecorder wrote into one DataFrame.
+
+    Args:
+        path (str | os.PathLike): The directory of the recorder.
+        table (str, optional): One of TABLES. Defaults to "metrics".
+        columns (list[str], optional): The columns to read. Defaults to all.
+
+    Returns:
+        pd.DataFrame: One row per recorded step, or per device and step for the table "agents".
+    """
+    # pandas comes with mesa, but only reading the chunks back needs it
+    import pandas as pd
+
+    chunks = [
+        {name: values for name, values in chunk.items() if columns is None or name in columns}
+        for chunk in iter_chunks(path, table)
+    ]
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    return pd.DataFrame({name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]})
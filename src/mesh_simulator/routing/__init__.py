@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
@@ -14,11 +15,52 @@ class RoutingAlgorithm(ABC):
 
     def __init__(self, device: DeviceAgent):
         self.device = device
+        self.suppressed_duplicates = 0
+        """The number of duplicate packets that were dropped instead of being routed again"""
 
     def step(self):
         """Perform any necessary periodic tasks."""
         pass
 
+    def idle_steps(self) -> float:
+        """Returns how many of the upcoming steps of this algorithm would only count down timers.
+
+        Returns:
+            float: The number of steps that may be skipped using `skip`. As the default `step` does nothing, this
+            defaults to infinity. Algorithms with periodic tasks must override it.
+        """
+        return math.inf
+
+    def skip(self, steps: int):
+        """Advances the timers of the algorithm as if it had been stepped `steps` times while idle.
+
+        Args:
+            steps (int): The number of steps to skip, at most `idle_steps()`.
+        """
+        pass
+
+    def on_packet(self, sender: DeviceAgent, protocol: Protocol, packet: Packet) -> bool:
+        """Handles a packet received by the device before anything else does, e.g. the control packets of the
+        algorithm.
+
+        Args:
+            sender (DeviceAgent): The device that the packet was received from.
+            protocol (Protocol): The protocol the packet was received with.
+            packet (Packet): The packet.
+
+        Returns:
+            bool: True if the packet was consumed by the algorithm, False to process it as usual.
+        """
+        return False
+
+    def on_connection_lost(self, neighbor: DeviceAgent):
+        """Called when the device dropped its last connection to a neighbor, e.g. to invalidate routes through it.
+
+        Args:
+            neighbor (DeviceAgent): The device that is no longer connected.
+        """
+        pass
+
     @abstractmethod
     def route(self, sender: DeviceAgent, protocol: Protocol, packet: Packet):
         """Route a packet, or drop it if it cannot be routed.
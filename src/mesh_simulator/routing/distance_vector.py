@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from loguru import logger
+
+from mesh_simulator import tracing
+from mesh_simulator.packets.route import RouteAdvertisement
+from mesh_simulator.routing import RoutingAlgorithm
+
+if TYPE_CHECKING:
+    from mesh_simulator.devices import DeviceAgent
+    from mesh_simulator.packets import Packet
+    from mesh_simulator.protocols import Protocol
+
+
+class Route(NamedTuple):
+    next_hop: DeviceAgent
+    hops: int
+    expires: int
+    """The step from which on the route is no longer used, unless it is advertised again"""
+
+
+class DistanceVectorRouting(RoutingAlgorithm):
+    def __init__(
+        self, device: DeviceAgent, advertise_interval: int = 50, route_timeout: int = 150, max_hops: int = 16
+    ):
+        """Forwards every packet along a single path, found by exchanging routing tables with the neighbors.
+
+        Every `advertise_interval` steps, the device sends each neighbor a RouteAdvertisement of the destinations it
+        can reach and their number of hops, leaving out the routes through that neighbor (split horizon). Like
+        handshakes, advertisements are sent immediately instead of being queued as tasks, and are never forwarded. A
+        device keeps the route with the fewest hops to each destination, and always takes the latest hops advertised by
+        the next hop of a route. Routes expire unless they are advertised again within `route_timeout` steps, and all
+        routes through a neighbor are removed as soon as the last connection to it is dropped.
+
+        Packets for a connected device are sent to it directly, all others to the next hop of their route. Packets
+        without a route are dropped and counted in `dropped_packets`.
+
+        Args:
+            device (DeviceAgent): The device the algorithm routes for.
+            advertise_interval (int, optional): How many steps between the advertisements. Defaults to 50.
+            route_timeout (int, optional): How many steps a route stays valid after it was advertised. Defaults to 150.
+            max_hops (int, optional): The number of hops from which on destinations count as unreachable, which ends
+            the counting to infinity after a link broke. Defaults to 16.
+        """
+        super().__init__(device)
+        self.advertise_interval = advertise_interval
+        self.route_timeout = route_timeout
+        self.max_hops = max_hops
+        self.routes: dict[DeviceAgent, Route] = {}
+        """The route to each destination, including expired ones until the next advertisement"""
+        self.dropped_packets = 0
+        """The number of packets that were dropped for lack of a route"""
+        # Spread the advertisements of the devices over the interval
+        self._next_advertisement = device.random.randrange(advertise_interval) + 1
+
+    def _now(self) -> int:
+        return self.device.model.schedule.steps
+
+    def step(self):
+        self._next_advertisement -= 1
+        if self._next_advertisement <= 0:
+            self._next_advertisement = self.advertise_interval
+            self._advertise()
+
+    def idle_steps(self) -> float:
+        return max(self._next_advertisement - 1, 0)
+
+    def skip(self, steps: int):
+        self._next_advertisement -= steps
+
+    def next_hop(self, destination: DeviceAgent) -> DeviceAgent | None:
+        """Returns the neighbor to send packets for a destination to, or None if there is no valid route."""
+        route = self.routes.get(destination)
+        if route is None or route.expires <= self._now() or not self.device.is_connected(route.next_hop):
+            return None
+        return route.next_hop
+
+    def _advertise(self):
+        now = self._now()
+        self.routes = {destination: route for destination, route in self.routes.items() if route.expires > now}
+        for neighbor in self.device.established_neighbors:
+            routes = tuple(
+                (destination, route.hops)
+                for destination, route in self.routes.items()
+                if route.next_hop is not neighbor and destination is not neighbor
+            )
+            if tracing.active and tracing.traces("routing", self.device):
+                logger.trace(f"Advertising {len(routes)} routes to {neighbor.name}")
+            # Like handshakes, advertisements are control traffic and aren't queued behind the tasks of the device, so
+            # the routes they carry are current when they arrive
+            protocol = self.device.connections.protocol_for(neighbor)
+            self.device.send_packet_immediate(protocol, RouteAdvertisement(self.device, neighbor, routes), neighbor)
+
+    def on_packet(self, sender: DeviceAgent, protocol: Protocol, packet: Packet) -> bool:
+        if not isinstance(packet, RouteAdvertisement):
+            return False
+        if packet.destination is not self.device:
+            return True  # advertisements are only valid for the neighbor they were built for, so drop it
+        now = self._now()
+        expires = now + self.route_timeout
+        self.routes[sender] = Route(sender, 1, expires)
+        for destination, hops in packet.routes:
+            if destination is self.device:
+                continue
+            hops += 1
+            route = self.routes.get(destination)
+            if route is not None and route.next_hop is sender:
+                # The next hop knows best how far the destination is, even if the route got longer
+                if hops >= self.max_hops:
+                    del self.routes[destination]
+                else:
+                    self.routes[destination] = Route(sender, hops, expires)
+            elif hops < self.max_hops and (route is None or route.expires <= now or hops < route.hops):
+                self.routes[destination] = Route(sender, hops, expires)
+        return True
+
+    def on_connection_lost(self, neighbor: DeviceAgent):
+        self.routes = {
+            destination: route for destination, route in self.routes.items() if route.next_hop is not neighbor
+        }
+
+    def route(self, sender: DeviceAgent, protocol: Protocol, packet: Packet):
+        if packet.ttl <= 0 or isinstance(packet, RouteAdvertisement):
+            return  # packet dropped, advertisements are never forwarded
+        new_packet = packet.with_ttl(packet.ttl - 1)
+        destination = new_packet.destination
+        next_hop = destination if self.device.is_connected(destination) else self.next_hop(destination)
+        if next_hop is None:
+            self.dropped_packets += 1
+            if tracing.active and tracing.traces("routing", self.device):
+                logger.debug(f"No route to {destination}, dropping packet")
+            return  # packet dropped
+        if tracing.active and tracing.traces("routing", self.device):
+            logger.debug(f"Routing packet for {destination} via {next_hop}")
+        self.device.send_packet(None, new_packet, next_hop)
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from typing import TYPE_CHECKING
 
 from loguru import logger
 
+from mesh_simulator import tracing
 from mesh_simulator.protocols import Protocol
 from mesh_simulator.routing import RoutingAlgorithm
 
@@ -13,18 +15,49 @@ if TYPE_CHECKING:
 
 
 class FloodRouting(RoutingAlgorithm):
+    def __init__(self, device: DeviceAgent, cache_size: int = 256):
+        """Forwards every packet to all connections except the one it was received from.
+
+        Each device remembers the ids of the packets it has routed, and drops copies of them that reach it again over
+        another path, so that a packet is forwarded at most once per device while it is remembered.
+
+        Args:
+            device (DeviceAgent): The device the algorithm routes for.
+            cache_size (int, optional): How many packet ids to remember. The least recently seen ids are forgotten
+            first. Defaults to 256.
+        """
+        super().__init__(device)
+        self.cache_size = cache_size
+        self._seen: OrderedDict[int, None] = OrderedDict()
+
+    def _is_duplicate(self, packet: Packet) -> bool:
+        if packet.id in self._seen:
+            self._seen.move_to_end(packet.id)
+            return True
+        self._seen[packet.id] = None
+        if len(self._seen) > self.cache_size:
+            self._seen.popitem(last=False)
+        return False
+
     def route(self, sender: DeviceAgent, protocol: Protocol, packet: Packet):
         if packet.ttl <= 0:
             return  # packet dropped
+        # Packets the device routes again itself, e.g. after losing a connection, are no duplicates
+        if self._is_duplicate(packet) and sender is not self.device:
+            self.suppressed_duplicates += 1
+            return  # packet dropped
         new_packet = packet.with_ttl(packet.ttl - 1)
         if sender.is_connected(new_packet.destination):
-            logger.debug(f"Sending packet directly to {new_packet.destination}")
+            if tracing.active and tracing.traces("routing", self.device):
+                logger.debug(f"Sending packet directly to {new_packet.destination}")
             self.device.send_packet(protocol, new_packet, new_packet.destination)
             return
-        logger.info(f"Looping over {len(self.device.connections)} connections")
+        if tracing.active and tracing.traces("routing", self.device):
+            logger.debug(f"Looping over {len(self.device.connections)} connections")
         for proto, neighbor in self.device.connections:
             if neighbor != sender:
-                logger.debug(
-                    f"Routing packet from {sender} to {neighbor}, expected destination: {new_packet.destination}"
-                )
+                if tracing.active and tracing.traces("routing", self.device):
+                    logger.debug(
+                        f"Routing packet from {sender} to {neighbor}, expected destination: {new_packet.destination}"
+                    )
                 self.device.send_packet(proto, new_packet, neighbor)
@@ -12,7 +12,9 @@ if TYPE_CHECKING:
 
 class RandomRouting(RoutingAlgorithm):
     def route(self, _sender: DeviceAgent, protocol: Protocol, packet: Packet):
-        next_hop = self.device.random.choice(self.device.established_neighbors)
-        if next_hop is not None:
-            self.device.send_packet(protocol, packet, next_hop)
-        # packet dropped if no neighbors
+        neighbors = self.device.established_neighbors
+        if not neighbors:
+            return  # packet dropped
+        next_hop = self.device.random.choice(neighbors)
+        # The packet may have been received with another protocol than the one connecting to the next hop
+        self.device.send_packet(None, packet, next_hop)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import mesa
+
+if TYPE_CHECKING:
+    from mesa.space import Coordinate
+
+
+class MeshGrid(mesa.space.MultiGrid):
+    def __init__(self, width: int, height: int, torus: bool = False, bucket_size: int = 16):
+        """A MultiGrid that additionally keeps its agents in a uniform hash grid, so that radius queries only visit
+        the buckets overlapping the queried area instead of every cell in the neighborhood.
+
+        Args:
+            width (int): The width of the grid.
+            height (int): The height of the grid.
+            torus (bool, optional): Whether the grid wraps around. Radius queries ignore the wrapping, just like
+            Protocol.can_connect does. Defaults to False.
+            bucket_size (int, optional): The edge length of a hash grid bucket, in cells. Defaults to 16.
+        """
+        super().__init__(width, height, torus)
+        self._bucket_size = bucket_size
+        self._buckets: dict[tuple[int, int], dict[mesa.Agent, None]] = {}
+
+    def _bucket(self, pos: Coordinate) -> tuple[int, int]:
+        x, y = pos
+        return x // self._bucket_size, y // self._bucket_size
+
+    def place_agent(self, agent: mesa.Agent, pos: Coordinate) -> None:
+        super().place_agent(agent, pos)
+        self._buckets.setdefault(self._bucket(agent.pos), {})[agent] = None
+
+    def remove_agent(self, agent: mesa.Agent) -> None:
+        bucket = self._bucket(agent.pos)
+        super().remove_agent(agent)
+        agents = self._buckets[bucket]
+        del agents[agent]
+        if not agents:
+            del self._buckets[bucket]
+
+    def get_agents_in_radius(self, pos: Coordinate, radius: int, manhattan: bool = False) -> list[mesa.Agent]:
+        """Returns all agents within a given distance of a position, including agents at the position itself.
+
+        Args:
+            pos (Coordinate): The position to search around.
+            radius (int): The maximum distance of the returned agents.
+            manhattan (bool, optional): If True, the distance is measured along the grid axes (like a von Neumann
+            neighborhood), otherwise it is the euclidean distance. Defaults to False.
+
+        Returns:
+            list[mesa.Agent]: The agents within the radius, in a deterministic order.
+        """
+        x, y = pos
+        size = self._bucket_size
+        min_bx, min_by = max(0, (x - radius) // size), max(0, (y - radius) // size)
+        max_bx = min((self.width - 1) // size, (x + radius) // size)
+        max_by = min((self.height - 1) // size, (y + radius) // size)
+        radius_squared = radius**2
+        result = []
+        for bx in range(min_bx, max_bx + 1):
+            for by in range(min_by, max_by + 1):
+                agents = self._buckets.get((bx, by))
+                if not agents:
+                    continue
+                for agent in agents:
+                    ax, ay = agent.pos
+                    if manhattan:
+                        if abs(ax - x) + abs(ay - y) <= radius:
+                            result.append(agent)
+                    elif (ax - x) ** 2 + (ay - y) ** 2 <= radius_squared:
+                        result.append(agent)
+        return result
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import itertools
+from typing import TYPE_CHECKING, Any, Iterable
+
+from mesh_simulator.model import MeshModel
+
+if TYPE_CHECKING:
+    from pyspark.sql import DataFrame, SparkSession
+
+
+def parameter_grid(parameters: dict[str, list]) -> list[dict[str, Any]]:
+    """Expands lists of parameter values into all of their combinations.
+
+    Args:
+        parameters (dict[str, list]): The values of each MeshModel parameter.
+
+    Returns:
+        list[dict[str, Any]]: One dict of MeshModel keyword arguments per combination.
+    """
+    return [dict(zip(parameters, values)) for values in itertools.product(*parameters.values())]
+
+
+def run_replicate(parameters: dict[str, Any], seed: int, steps: int) -> list[dict[str, Any]]:
+    """Runs a single MeshModel and returns the collected model variables.
+
+    Args:
+        parameters (dict[str, Any]): The keyword arguments of the MeshModel.
+        seed (int): The seed of the replicate.
+        steps (int): The number of steps to run.
+
+    Returns:
+        list[dict[str, Any]]: One row per collected step, holding the parameters, the seed, the step and all metrics.
+    """
+    model = MeshModel(**parameters, seed=seed)
+    return [
+        {**parameters, "seed": seed, "Step": step, **{name: float(value) for name, value in metrics.items()}}
+        for step, metrics in model.iter_steps(steps)
+    ]
+
+
+def _spark_type(values: list):
+    # The narrowest type that holds all values of a parameter, e.g. DoubleType if any of the values is a float
+    from pyspark.sql import types
+
+    if all(isinstance(value, bool) for value in values):
+        return types.BooleanType()
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        return types.LongType()
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        return types.DoubleType()
+    return types.StringType()
+
+
+def _spark_value(value: Any, spark_type) -> Any:
+    from pyspark.sql import types
+
+    if isinstance(spark_type, types.DoubleType):
+        return float(value)
+    if isinstance(spark_type, types.StringType):
+        return str(value)
+    return value
+
+
+def sweep(spark: SparkSession, parameters: dict[str, list], seeds: Iterable[int], steps: int) -> DataFrame:
+    """Runs every combination of parameters with every seed as a separate Spark task.
+
+    This requires the `spark` extra. Each replicate runs in a single task, so the parallelism is bounded by the number
+    of combinations times the number of seeds.
+
+    Args:
+        spark (SparkSession): The session to run the sweep in, e.g. a local[*] session.
+        parameters (dict[str, list]): The values of each MeshModel parameter, see `parameter_grid`.
+        seeds (Iterable[int]): The seeds of the replicates of each combination.
+        steps (int): The number of steps to run each replicate.
+
+    Returns:
+        DataFrame: The model variables of all replicates, as returned by `run_replicate`.
+    """
+    from pyspark.sql import types
+
+    # The seeds are reused for every combination, so a one-shot iterable must not be consumed by the first one
+    seeds = list(seeds)
+    tasks = [(combination, seed) for combination in parameter_grid(parameters) for seed in seeds]
+    if not tasks:
+        raise ValueError("The sweep contains no replicates")
+
+    # Declaring the schema upfront keeps Spark from running a replicate just to infer it
+    combination = tasks[0][0]
+    # Models only report Robustness up to a size, so declare it and leave it empty for the replicates without it
+    schema_model = MeshModel(**{**combination, "n_agents": 0, "robustness": True})
+    metrics = [name for name in schema_model.datacollector.model_vars if name != "Step"]
+    parameter_types = {name: _spark_type(values) for name, values in parameters.items()}
+    schema = types.StructType(
+        [types.StructField(name, spark_type) for name, spark_type in parameter_types.items()]
+        + [types.StructField("seed", types.LongType()), types.StructField("Step", types.LongType())]
+        + [types.StructField(name, types.DoubleType()) for name in metrics]
+    )
+    columns = schema.fieldNames()
+
+    def to_rows(task: tuple[dict[str, Any], int]) -> list[tuple]:
+        return [
+            tuple(
+                _spark_value(row[column], parameter_types[column]) if column in parameter_types else row.get(column)
+                for column in columns
+            )
+            for row in run_replicate(*task, steps)
+        ]
+
+    rows = spark.sparkContext.parallelize(tasks, numSlices=len(tasks)).flatMap(to_rows)
+    return spark.createDataFrame(rows, schema)
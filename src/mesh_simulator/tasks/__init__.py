@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from enum import Enum
+from enum import Enum, IntEnum
 from typing import TYPE_CHECKING
 
 from mesh_simulator.packets import Packet
@@ -19,7 +19,18 @@ class TaskStatus(Enum):
     FAILED = 2
 
 
+class TaskPriority(IntEnum):
+    """Enumeration of task priorities. Tasks of a lower value run first."""
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
 class Task(ABC):
+    priority: TaskPriority = TaskPriority.NORMAL
+    """The lane of the TaskQueue the task is queued in"""
+
     def __init__(self, name: str):
         self._name = name
         self._status = TaskStatus.PENDING
@@ -35,9 +46,30 @@ class Task(ABC):
     def status(self) -> TaskStatus:
         return self._status
 
+    @property
+    def peer(self) -> DeviceAgent | None:
+        """The device the task interacts with, if any. TaskQueue indexes tasks by their type and peer."""
+        return None
+
     def on_packet(self, agent: DeviceAgent, sender: DeviceAgent, protocol: Protocol, data: Packet) -> bool:
         # By default, tasks do not process any packets
         return False
 
+    def idle_steps(self) -> float:
+        """Returns how many of the upcoming steps of this task would only count down timers.
+
+        Returns:
+            float: The number of steps that may be skipped using `skip`. Defaults to 0, i.e. the task must be stepped.
+        """
+        return 0
+
+    def skip(self, steps: int):
+        """Advances the timers of the task as if it had been stepped `steps` times while idle.
+
+        Args:
+            steps (int): The number of steps to skip, at most `idle_steps()`.
+        """
+        pass
+
     @abstractmethod
     def step(self, agent: DeviceAgent): ...
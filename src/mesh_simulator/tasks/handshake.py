@@ -5,10 +5,11 @@ from typing import TYPE_CHECKING
 
 from loguru import logger
 
+from mesh_simulator import tracing
 from mesh_simulator.packets.handshake import (HandshakePacket,
                                               HandshakePacketType)
 from mesh_simulator.protocols import Protocol
-from mesh_simulator.tasks import Task, TaskStatus
+from mesh_simulator.tasks import Task, TaskPriority, TaskStatus
 
 if TYPE_CHECKING:
     from mesh_simulator.devices import DeviceAgent
@@ -25,6 +26,8 @@ class HandshakeState(Enum):
 
 
 class HandshakeTask(Task):
+    priority = TaskPriority.HIGH
+
     def __init__(self, other: DeviceAgent, protocol: Protocol, timeout: int = 5, server: bool = False):
         """Initializes a new HandshakeTask.
 
@@ -44,6 +47,10 @@ class HandshakeTask(Task):
     def other(self) -> DeviceAgent:
         return self._other
 
+    @property
+    def peer(self) -> DeviceAgent:
+        return self._other
+
     def on_packet(self, agent: DeviceAgent, sender: DeviceAgent, protocol: Protocol, pkt: Packet) -> bool:
         """Processes incoming packets.
 
@@ -99,6 +106,7 @@ class HandshakeTask(Task):
                 self._protocol, HandshakePacket(agent, self._other, HandshakePacketType.ESTABLISH), self._other
             )
             agent.connections.add((self._protocol, self._other))
-            logger.info(f"Handshake completed between {agent.name} and {self._other.name}")
+            if tracing.active and tracing.traces("task", agent):
+                logger.info(f"Handshake completed between {agent.name} and {self._other.name}")
             self._status = TaskStatus.COMPLETED
         self._timeout -= 1
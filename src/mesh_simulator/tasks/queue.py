@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING, Iterator
+
+from mesh_simulator.tasks import Task, TaskPriority
+
+if TYPE_CHECKING:
+    from mesh_simulator.devices import DeviceAgent
+
+
+class TaskQueue:
+    def __init__(self):
+        """The queued tasks of a device, with one first-in-first-out lane per TaskPriority.
+
+        The head of the queue is the oldest task of the highest priority lane that holds any tasks. Queuing, removing
+        the head of a lane and looking up whether a task of a given type and peer is queued all take constant time.
+        """
+        self._lanes: tuple[deque[Task], ...] = tuple(deque() for _ in TaskPriority)
+        self._peers: dict[tuple[type[Task], DeviceAgent], int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Task]:
+        """Iterates over the tasks in the order they will run, unless more tasks are queued."""
+        for lane in self._lanes:
+            yield from lane
+
+    def __repr__(self):
+        return f"TaskQueue({list(self)})"
+
+    def push(self, task: Task) -> None:
+        self._lanes[task.priority].append(task)
+        self._size += 1
+        peer = task.peer
+        if peer is not None:
+            key = (type(task), peer)
+            self._peers[key] = self._peers.get(key, 0) + 1
+
+    def peek(self) -> Task | None:
+        """Returns the task to run next, or None if the queue is empty."""
+        for lane in self._lanes:
+            if lane:
+                return lane[0]
+        return None
+
+    def pop(self) -> Task:
+        """Removes and returns the task to run next.
+
+        Raises:
+            IndexError: If the queue is empty.
+        """
+        for lane in self._lanes:
+            if lane:
+                task = lane.popleft()
+                self._forget(task)
+                return task
+        raise IndexError("pop from an empty TaskQueue")
+
+    def remove(self, task: Task) -> None:
+        """Removes a task from the queue. This takes constant time if the task is the head of its lane, which the
+        active task of a device always is, even if tasks of a higher priority were queued since it started.
+
+        Raises:
+            ValueError: If the task isn't queued.
+        """
+        lane = self._lanes[task.priority]
+        if lane and lane[0] is task:
+            lane.popleft()
+        else:
+            lane.remove(task)
+        self._forget(task)
+
+    def has_task(self, task_type: type[Task], peer: DeviceAgent) -> bool:
+        """Returns whether a task of the given type (not a subclass of it) with the given peer is queued.
+
+        Args:
+            task_type (type[Task]): The type of the task.
+            peer (DeviceAgent): The peer of the task, see Task.peer.
+
+        Returns:
+            bool: True if such a task is queued, regardless of its status.
+        """
+        return (task_type, peer) in self._peers
+
+    def _forget(self, task: Task) -> None:
+        self._size -= 1
+        peer = task.peer
+        if peer is not None:
+            key = (type(task), peer)
+            if self._peers[key] == 1:
+                del self._peers[key]
+            else:
+                self._peers[key] -= 1
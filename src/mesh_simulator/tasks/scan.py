@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Callable
 
 from mesh_simulator.protocols import Protocol
-from mesh_simulator.tasks import Task, TaskStatus
+from mesh_simulator.tasks import Task, TaskPriority, TaskStatus
 from mesh_simulator.tasks.handshake import HandshakeTask
 
 if TYPE_CHECKING:
@@ -11,25 +11,35 @@ if TYPE_CHECKING:
     from mesh_simulator.packets import Packet
 
 
+def _ignore_device(protocol: Protocol, device: DeviceAgent) -> None:
+    pass
+
+
 class ScanTask(Task):
+    priority = TaskPriority.LOW
+
     def __init__(
         self,
         protocol: Protocol,
-        on_device_discovered: Callable[[Protocol, DeviceAgent], None] = lambda _, __: None,
+        on_device_discovered: Callable[[Protocol, DeviceAgent], None] | None = None,
     ):
         super().__init__("Scan Task")
         self._protocol = protocol
         self._duration = protocol.scan_duration
-        self._on_device_discovered = on_device_discovered
+        self._on_device_discovered = on_device_discovered if on_device_discovered is not None else _ignore_device
+
+    def idle_steps(self) -> float:
+        return max(self._duration - 1, 0)
+
+    def skip(self, steps: int):
+        self._duration -= steps
 
     def step(self, agent: DeviceAgent):
         self._duration -= 1
 
         if self._duration <= 0:
             agent.consumed_energy += self._protocol.scan_cost
-            neighbors = agent.model.grid.get_neighbors(
-                agent.pos, moore=False, include_center=True, radius=self._protocol.scan_radius
-            )
+            neighbors = agent.model.grid.get_agents_in_radius(agent.pos, self._protocol.scan_radius, manhattan=True)
             for neighbor in neighbors:
                 if neighbor != agent:
                     self._on_device_discovered(self._protocol, neighbor)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from enum import Enum
+from typing import TYPE_CHECKING
+
+import mesa
+
+if TYPE_CHECKING:
+    from mesh_simulator.devices import DeviceAgent
+
+
+class EventType(Enum):
+    """Enumeration of the events handled by the EventActivation scheduler."""
+
+    ACTIVATE = 0
+    MOVE = 1
+
+
+class EventActivation(mesa.time.BaseScheduler):
+    def __init__(self, model: mesa.Model):
+        """A scheduler that only activates devices on steps in which they have something to do.
+
+        Devices report how many of their upcoming steps would only count down timers (see DeviceAgent.idle_steps). The
+        scheduler keeps a heap of the next activation of every device and jumps straight to the next step on which any
+        device is due, advancing the timers of the skipped steps in bulk. The chance of moving in each skipped step is
+        replaced by move events, drawn from the same geometric distribution. If the model has a `mobility`, devices
+        don't move when stepped, so their move events are scheduled regardless of their activations.
+
+        Devices that are due on the same step are activated in random order, like in RandomActivation. During a step,
+        `steps` and `time` hold the number of the step being executed, so a single call to `step` may advance them by
+        more than one.
+
+        Args:
+            model (mesa.Model): The model to which the schedule belongs.
+        """
+        super().__init__(model)
+        self._events: list[tuple[int, int, EventType, DeviceAgent]] = []
+        self._sequence = itertools.count()
+        self._activations: dict[DeviceAgent, tuple[int, int]] = {}
+        self._moves: dict[DeviceAgent, tuple[int, int]] = {}
+        self._last_activation: dict[DeviceAgent, int] = {}
+
+    def add(self, agent: DeviceAgent) -> None:
+        super().add(agent)
+        self._last_activation[agent] = self.time - 1
+        self._schedule(agent, EventType.ACTIVATE, self.time)
+
+    def remove(self, agent: DeviceAgent) -> None:
+        super().remove(agent)
+        self._activations.pop(agent, None)
+        self._moves.pop(agent, None)
+        del self._last_activation[agent]
+
+    def wake(self, agent: DeviceAgent) -> None:
+        """Makes sure that a device is activated on the next step, e.g. because a task was queued for it.
+
+        Args:
+            agent (DeviceAgent): The device to wake up.
+        """
+        if agent not in self._last_activation:
+            return
+        activation = self._activations.get(agent)
+        if activation is None or activation[0] > self.time + 1:
+            self._schedule(agent, EventType.ACTIVATE, self.time + 1)
+            move = self._moves.get(agent)
+            if move is not None and move[0] >= self.time + 1 and self._moves_on_activation():
+                del self._moves[agent]
+
+    def step(self) -> None:
+        due = self._pop_due()
+        self.model.random.shuffle(due)
+        for event_type, agent in due:
+            if event_type == EventType.ACTIVATE:
+                self._activate(agent)
+            else:
+                self._move(agent)
+        self.steps = self.time = self.time + 1
+
+    def _schedule(self, agent: DeviceAgent, event_type: EventType, time: int) -> None:
+        sequence = next(self._sequence)
+        pending = self._activations if event_type == EventType.ACTIVATE else self._moves
+        pending[agent] = (time, sequence)
+        heapq.heappush(self._events, (time, sequence, event_type, agent))
+
+    def _is_pending(self, time: int, sequence: int, event_type: EventType, agent: DeviceAgent) -> bool:
+        pending = self._activations if event_type == EventType.ACTIVATE else self._moves
+        return pending.get(agent) == (time, sequence)
+
+    def _pop_due(self) -> list[tuple[EventType, DeviceAgent]]:
+        # Events are invalidated lazily when rescheduled, so skip all stale entries at the top of the heap
+        while self._events and not self._is_pending(*self._events[0]):
+            heapq.heappop(self._events)
+        if not self._events:
+            return []
+        self.steps = self.time = max(self.time, self._events[0][0])
+        due = []
+        while self._events and self._events[0][0] <= self.time:
+            event = heapq.heappop(self._events)
+            if self._is_pending(*event):
+                due.append((event[2], event[3]))
+        return due
+
+    def _activate(self, agent: DeviceAgent) -> None:
+        del self._activations[agent]
+        moves_on_activation = self._moves_on_activation()
+        if moves_on_activation:
+            self._moves.pop(agent, None)
+        skipped = self.time - self._last_activation[agent] - 1
+        if skipped > 0:
+            agent.skip(skipped)
+        self._last_activation[agent] = self.time
+        agent.step()
+
+        idle_steps = agent.idle_steps()
+        if agent not in self._activations and idle_steps != math.inf:
+            self._schedule(agent, EventType.ACTIVATE, self.time + idle_steps + 1)
+        if moves_on_activation or agent not in self._moves:
+            self._schedule_move(agent)
+
+    def _move(self, agent: DeviceAgent) -> None:
+        del self._moves[agent]
+        peers = self.model.adjacency.connected_to(agent)
+        mobility = getattr(self.model, "mobility", None)
+        if mobility is None:
+            agent._relocate()
+        else:
+            mobility.move(agent, self.time)
+        agent._drop_timeout_connections()
+        for peer in peers:
+            peer._drop_timeout_connection(agent)
+        self._schedule_move(agent)
+
+    def _moves_on_activation(self) -> bool:
+        # Devices only make their own move attempt when stepped if the model doesn't move them, see DeviceAgent.step
+        return getattr(self.model, "mobility", None) is None
+
+    def _schedule_move(self, agent: DeviceAgent) -> None:
+        # The steps until the next successful move attempt are geometrically distributed. If every activated step makes
+        # its own move attempt, moves only need to be scheduled until the next activation. Otherwise, the move events
+        # are the only move attempts, and are scheduled regardless of the activations.
+        mobility = getattr(self.model, "mobility", None)
+        probability = agent.move_probability if mobility is None else mobility.move_probability
+        if probability <= 0:
+            return
+        if probability >= 1:
+            delay = 1
+        else:
+            delay = 1 + int(math.log(1 - self.model.random.random()) / math.log(1 - probability))
+        activation = self._activations.get(agent)
+        if mobility is not None or activation is None or self.time + delay < activation[0]:
+            self._schedule(agent, EventType.MOVE, self.time + delay)
@@ -0,0 +1,69 @@
+"""Switches for the log messages on the simulation hot path.
+
+Log calls in the per-step and per-packet code of the devices, routing algorithms and tasks are guarded by
+
+    if tracing.active and tracing.traces("routing", self.device):
+        logger.debug(...)
+
+so that neither the message nor the call to the logger costs anything unless tracing is enabled for the run. The
+messages are still filtered by the level of the configured log handlers. Read `active` through the module, as
+`enable` and `disable` rebind it.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from mesh_simulator.devices import DeviceAgent
+
+SUBSYSTEMS = ("device", "routing", "task")
+"""The subsystems whose hot-path messages can be traced"""
+
+active = False
+"""Whether tracing is enabled for any subsystem or device"""
+
+_subsystems: frozenset[str] | None = None
+_devices: frozenset[str] | None = None
+
+
+def enable(*subsystems: str, devices: Iterable[str] | None = None) -> None:
+    """Enables the hot-path log messages.
+
+    Args:
+        *subsystems (str): The subsystems to trace, see SUBSYSTEMS. Traces all subsystems if none are given.
+        devices (Iterable[str], optional): The names of the devices to trace. Defaults to None, tracing all devices.
+    """
+    global active, _subsystems, _devices
+    unknown = set(subsystems) - set(SUBSYSTEMS)
+    if unknown:
+        raise ValueError(f"Unknown subsystems: {', '.join(sorted(unknown))}")
+    _subsystems = frozenset(subsystems) if subsystems else None
+    _devices = frozenset(devices) if devices is not None else None
+    active = True
+
+
+def disable() -> None:
+    """Disables the hot-path log messages again."""
+    global active, _subsystems, _devices
+    active = False
+    _subsystems = None
+    _devices = None
+
+
+def traces(subsystem: str, device: DeviceAgent | None = None) -> bool:
+    """Returns whether the messages of a subsystem about a device should be logged. Only check this after `active`.
+
+    Args:
+        subsystem (str): The subsystem emitting the message, see SUBSYSTEMS.
+        device (DeviceAgent, optional): The device the message is about. Defaults to None, which is traced whenever
+        the subsystem is.
+
+    Returns:
+        bool: True if the message should be logged.
+    """
+    if not active:
+        return False
+    if _subsystems is not None and subsystem not in _subsystems:
+        return False
+    return _devices is None or device is None or device.name in _devices
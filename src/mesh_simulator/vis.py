@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+from weakref import WeakKeyDictionary
+
+import numpy as np
 import solara
+from matplotlib.collections import LineCollection, PathCollection
 from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+
+from mesh_simulator.model import TOPOLOGY_METRICS
 
 
 def agent_portrayal(agent):
@@ -11,35 +18,176 @@ def agent_portrayal(agent):
     }
 
 
-def connections(model):
-    fig = Figure()
-    ax = fig.subplots()
-    for agent in model.schedule.agents:
-        # dot for agent, and line to each connection
-        color = "tab:blue"
-        if not agent._tasks:
-            color = "tab:gray"
-        elif agent._tasks[0].__class__.__name__ == "HandshakeTask":
-            color = "tab:orange"
-        elif agent._tasks[0].__class__.__name__ == "ScanTask":
-            color = "tab:red"
-        ax.plot(agent.pos[0], agent.pos[1], "o", color=color)
-        for _proto, connection in agent.connections:
-            conn_color = "tab:green" if connection.is_connected(agent) else "tab:red"
-            ax.plot(
-                [agent.pos[0], connection.pos[0]],
-                [agent.pos[1], connection.pos[1]],
-                color=conn_color,
+HEATMAP_THRESHOLD = 500
+"""Above this number of devices, `connections` draws the density of devices instead of single devices and links"""
+
+_TASK_COLORS = {None: "tab:gray", "HandshakeTask": "tab:orange", "ScanTask": "tab:red"}
+
+
+class ConnectionsView:
+    def __init__(self, width: int, height: int, heatmap_threshold: int = HEATMAP_THRESHOLD):
+        """A figure of the devices of a model and their connections, updated in place from frame to frame.
+
+        All devices are drawn as one scatter plot, colored by their active task, and all connections as one
+        LineCollection, green if both devices hold the connection and red otherwise. Above `heatmap_threshold` devices,
+        the figure shows a heatmap of the number of devices in each cell instead.
+
+        Args:
+            width (int): The width of the grid.
+            height (int): The height of the grid.
+            heatmap_threshold (int, optional): The number of devices above which to draw a heatmap. Defaults to
+            HEATMAP_THRESHOLD.
+        """
+        self.width = width
+        self.height = height
+        self.heatmap_threshold = heatmap_threshold
+        self.figure = Figure()
+        self._ax = self.figure.subplots()
+        self._ax.set(xlim=(-1, width), ylim=(-1, height))
+        self._links: LineCollection | None = None
+        self._devices: PathCollection | None = None
+        self._heatmap: AxesImage | None = None
+
+    def update(self, model) -> Figure:
+        """Redraws the figure for the current state of a model.
+
+        Args:
+            model (MeshModel): The model to draw.
+
+        Returns:
+            Figure: The updated figure.
+        """
+        agents = list(model.schedule.agents)
+        if len(agents) > self.heatmap_threshold:
+            self._update_heatmap(agents)
+        else:
+            self._update_devices(agents)
+        return self.figure
+
+    def _update_devices(self, agents: list) -> None:
+        positions = np.array([agent.pos for agent in agents], dtype=float).reshape(-1, 2)
+        colors = []
+        for agent in agents:
+            active_task = agent._tasks.peek()
+            colors.append(_TASK_COLORS.get(type(active_task).__name__ if active_task is not None else None, "tab:blue"))
+        index = {agent: i for i, agent in enumerate(agents)}
+        segments = []
+        link_colors = []
+        for agent in agents:
+            for other in agent.connections.neighbors():
+                mutual = other.is_connected(agent)
+                # Draw connections held by both devices only once
+                if mutual and index.get(other, -1) < index[agent]:
+                    continue
+                segments.append((agent.pos, other.pos))
+                link_colors.append("tab:green" if mutual else "tab:red")
+
+        if self._devices is None:
+            self._links = LineCollection(segments, colors=link_colors, zorder=1)
+            self._ax.add_collection(self._links)
+            self._devices = self._ax.scatter(positions[:, 0], positions[:, 1], c=colors, zorder=2)
+        else:
+            self._links.set_segments(segments)
+            self._links.set_color(link_colors)
+            self._devices.set_offsets(positions)
+            self._devices.set_facecolor(colors)
+            self._devices.set_edgecolor(colors)
+
+    def _update_heatmap(self, agents: list) -> None:
+        counts = np.zeros((self.height, self.width))
+        x, y = np.array([agent.pos for agent in agents], dtype=np.int64).reshape(-1, 2).T
+        np.add.at(counts, (y, x), 1)
+        if self._heatmap is None:
+            self._heatmap = self._ax.imshow(
+                counts, origin="lower", extent=(-0.5, self.width - 0.5, -0.5, self.height - 0.5), cmap="viridis"
             )
-    solara.FigureMatplotlib(fig)
+            self.figure.colorbar(self._heatmap, ax=self._ax, label="Devices")
+        else:
+            self._heatmap.set_data(counts)
+        self._heatmap.set_clim(0, max(counts.max(), 1))
+
+
+_views: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def connections(model):
+    # The view of each model is kept between frames, so that its artists are updated instead of recreated
+    view = _views.get(model)
+    if view is None:
+        view = _views[model] = ConnectionsView(model.grid.width, model.grid.height)
+    fig = view.update(model)
+    solara.FigureMatplotlib(fig, dependencies=[model, model.schedule.steps], format="png")
+
+
+def _decimate(x: np.ndarray, y: np.ndarray, buckets: int) -> tuple[np.ndarray, np.ndarray]:
+    # Keeps the lowest and the highest point of each bucket of consecutive points, in their original order, so that
+    # spikes stay visible however far the series is thinned out
+    size = -(-len(x) // buckets)
+    keep = []
+    for start in range(0, len(x), size):
+        bucket = y[start : start + size]
+        keep.extend(sorted({start + int(np.argmin(bucket)), start + int(np.argmax(bucket))}))
+    return x[keep], y[keep]
+
+
+class MetricsChartView:
+    def __init__(self, names: list[str], max_points: int = 500):
+        """A line chart of the metrics collected by a model, extended with the new rows of each frame.
+
+        The view only reads the rows appended to the DataCollector since its last update. Once a series holds more
+        than twice `max_points` points, it is thinned out to `max_points` by min/max decimation, so the cost of a frame
+        stays bounded however long the model runs.
+
+        Args:
+            names (list[str]): The model reporters to plot.
+            max_points (int, optional): The number of points each series is thinned out to. Defaults to 500.
+        """
+        self.names = names
+        self.max_points = max_points
+        self.rows = 0
+        """The number of rows read from the DataCollector so far"""
+        self.figure = Figure()
+        self._ax = self.figure.subplots()
+        self._ax.set(title="Topology Metrics", xlabel="Steps", ylabel="Value")
+        self._lines = [self._ax.plot([], [], label=name)[0] for name in names]
+        self._ax.legend()
+        self._x = [np.empty(0) for _ in names]
+        self._y = [np.empty(0) for _ in names]
+
+    def update(self, model) -> Figure:
+        """Appends the rows the DataCollector of a model collected since the last update.
+
+        Args:
+            model (MeshModel): The model to plot.
+
+        Returns:
+            Figure: The updated figure.
+        """
+        model_vars = model.datacollector.model_vars
+        total = len(model_vars[self.names[0]]) if self.names else 0
+        if total <= self.rows:
+            return self.figure
+        steps = model_vars.get("Step")
+        x = np.array(steps[self.rows : total] if steps is not None else range(self.rows, total), dtype=float)
+        for i, name in enumerate(self.names):
+            self._x[i] = np.concatenate([self._x[i], x])
+            self._y[i] = np.concatenate([self._y[i], np.array(model_vars[name][self.rows : total], dtype=float)])
+            if len(self._x[i]) > 2 * self.max_points:
+                self._x[i], self._y[i] = _decimate(self._x[i], self._y[i], self.max_points // 2)
+            self._lines[i].set_data(self._x[i], self._y[i])
+        self.rows = total
+        self._ax.relim()
+        self._ax.autoscale_view()
+        return self.figure
+
+
+_charts: WeakKeyDictionary = WeakKeyDictionary()
 
 
 def topology_metrics(model):
-    data = model.datacollector.get_model_vars_dataframe()
-    data = data.drop("Average Transit Time", axis=1)
-    fig = Figure()
-    ax = fig.subplots()
-    ax.plot(data)
-    ax.set(title="Topology Metrics", xlabel="Steps", ylabel="Value")
-    ax.legend(data.columns)
-    solara.FigureMatplotlib(fig)
+    chart = _charts.get(model)
+    if chart is None:
+        names = [name for name in model.datacollector.model_vars if name in TOPOLOGY_METRICS]
+        chart = _charts[model] = MetricsChartView(names)
+    fig = chart.update(model)
+    solara.FigureMatplotlib(fig, dependencies=[model, chart.rows])
@@ -0,0 +1,37 @@
+"""Tests the benchmark suite."""
+
+from __future__ import annotations
+
+import json
+
+from mesh_simulator.benchmark import compare, main, run_case
+
+
+def test_run_case_times_every_part():
+    case = run_case(6, 0.1, steps=2, warmup=1)
+    assert (case["width"], case["height"]) == (8, 8)
+    assert {"topology", "metric:Robustness", "datacollector.collect", "schedule.step", "mobility.step"} <= set(
+        case["timings"]
+    )
+    assert all(timing["min"] <= timing["median"] for timing in case["timings"].values())
+
+
+def test_compare_reports_regressions():
+    def results(seconds):
+        timings = {"schedule.step": {"median": seconds, "min": seconds}, "fast": {"median": 1e-5, "min": 1e-5}}
+        return {"cases": [{"n_agents": 200, "density": 0.05, "timings": timings}]}
+
+    assert compare(results(0.1), results(0.12)) == []
+    regressions = compare(results(0.2), results(0.1))
+    assert len(regressions) == 1 and regressions[0].startswith("schedule.step with 200 agents")
+    assert compare(results(0.2), {"cases": []}) == []
+
+
+def test_main_compares_to_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    arguments = ["--agents", "3", "--densities", "0.1", "--steps", "1", "--warmup", "0"]
+    assert main([*arguments, "-o", str(baseline)]) == 0
+    assert json.loads(baseline.read_text())["cases"][0]["n_agents"] == 3
+    # The timings of such a small model are mostly noise
+    results = tmp_path / "results.json"
+    assert main([*arguments, "-o", str(results), "--baseline", str(baseline), "--threshold", "1000"]) == 0
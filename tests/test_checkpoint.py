@@ -0,0 +1,66 @@
+"""Tests saving and loading models."""
+
+from __future__ import annotations
+
+import pytest
+
+from mesh_simulator import checkpoint
+from mesh_simulator.fast import FastMeshModel
+from mesh_simulator.model import MeshModel
+
+
+def _state(model):
+    positions = sorted((device.name, device.pos) for device in model.schedule.agents)
+    connections = sorted(
+        (device.name, other.name) for device in model.schedule.agents for _, other in device.connections
+    )
+    return positions, connections, model.datacollector.get_model_vars_dataframe()
+
+
+@pytest.mark.parametrize("event_driven", [False, True])
+def test_loaded_model_continues_like_the_saved_one(tmp_path, event_driven):
+    model = MeshModel(8, 15, 15, event_driven=event_driven, seed=2)
+    while model.schedule.steps < 150:
+        model.step()
+    checkpoint.save(model, tmp_path / "model.ckpt")
+
+    loaded = checkpoint.load(tmp_path / "model.ckpt")
+    assert loaded.schedule.steps == model.schedule.steps
+    assert len(loaded.datacollector.model_vars["Reachability"]) == len(model.datacollector.model_vars["Reachability"])
+    for copy in (model, loaded):
+        while copy.schedule.steps < 200:
+            copy.step()
+
+    (positions, connections, data), (loaded_positions, loaded_connections, loaded_data) = _state(model), _state(loaded)
+    assert positions == loaded_positions
+    assert connections == loaded_connections
+    assert data.equals(loaded_data)
+
+
+def test_forks_diverge(tmp_path):
+    model = MeshModel(10, 20, 20, seed=2)
+    checkpoint.save(model, tmp_path / "model.ckpt")
+    first, second = checkpoint.fork(tmp_path / "model.ckpt", 1), checkpoint.fork(tmp_path / "model.ckpt", 2)
+    for fork in (first, second):
+        for _ in range(20):
+            fork.step()
+    assert _state(first)[0] != _state(second)[0]
+
+
+def test_fast_model_roundtrip(tmp_path):
+    model = FastMeshModel(20, 30, 30, seed=2)
+    model.step()
+    checkpoint.save(model, tmp_path / "fast.ckpt")
+    loaded = checkpoint.load(tmp_path / "fast.ckpt")
+    assert (loaded.positions == model.positions).all()
+    assert loaded.devices[0].pos == model.devices[0].pos
+
+
+def test_load_rejects_other_files(tmp_path):
+    import gzip
+    import pickle
+
+    with gzip.open(tmp_path / "other.ckpt", "wb") as file:
+        pickle.dump({"model": None}, file)
+    with pytest.raises(ValueError):
+        checkpoint.load(tmp_path / "other.ckpt")
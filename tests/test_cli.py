@@ -0,0 +1,64 @@
+"""Tests the headless command line interface."""
+
+from __future__ import annotations
+
+import csv
+import io
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from mesh_simulator.cli import main
+
+
+def test_main_streams_rows(capsys):
+    main(["-n", "5", "--width", "10", "--height", "10", "-s", "4", "--seed", "1"])
+    rows = list(csv.reader(io.StringIO(capsys.readouterr().out)))
+    assert rows[0][:2] == ["Step", "Reachability"]
+    assert [row[0] for row in rows[1:]] == ["0", "1", "2", "3"]
+
+
+def test_main_event_driven_to_file(tmp_path):
+    output = tmp_path / "metrics.csv"
+    main(["-n", "3", "--width", "10", "--height", "10", "-s", "50", "--event-driven", "-o", str(output)])
+    rows = list(csv.reader(output.open()))
+    assert rows[0].count("Step") == 1
+    assert int(rows[-1][0]) < 50
+
+
+def test_main_does_not_import_ui():
+    code = (
+        "import sys; from mesh_simulator.cli import main; main(['-n', '2', '-s', '1']); "
+        "assert not {'solara', 'matplotlib'} & set(sys.modules)"
+    )
+    src = Path(__file__).parent.parent / "src"
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, env={"PYTHONPATH": str(src)})
+
+
+def test_main_collects_every_k_steps_in_workers(capsys):
+    main(["-n", "4", "--width", "10", "--height", "10", "-s", "6", "--collect-every", "3", "--metric-workers", "1"])
+    rows = list(csv.reader(io.StringIO(capsys.readouterr().out)))
+    assert [row[0] for row in rows[1:]] == ["0", "3"]
+
+
+def test_main_rejects_collect_every_below_1():
+    with pytest.raises(SystemExit):
+        main(["-n", "4", "--collect-every", "0"])
+
+
+def test_main_closes_metric_pool_on_error(monkeypatch):
+    from mesh_simulator import cli
+
+    closed = []
+    close = cli.MetricPool.close
+    monkeypatch.setattr(cli.MetricPool, "close", lambda self: (closed.append(self), close(self)))
+
+    def fail(model, steps, output):
+        raise RuntimeError("run failed")
+
+    monkeypatch.setattr(cli, "run", fail)
+    with pytest.raises(RuntimeError):
+        main(["-n", "4", "--width", "10", "--height", "10", "--metric-workers", "1"])
+    assert len(closed) == 1
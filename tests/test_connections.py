@@ -0,0 +1,43 @@
+"""Tests the connection table of the devices."""
+
+from __future__ import annotations
+
+from mesh_simulator.model import MeshModel
+
+
+def test_connection_table_indexes():
+    model = MeshModel(3, 10, 10)
+    a, b, c = sorted(model.schedule.agents, key=lambda device: device.name)
+    protocol = a.protocols[0]
+
+    a.connections.add((protocol, b))
+    a.connections.add((protocol, b))
+    a.connections.add((protocol, c))
+    c.connections.add((c.protocols[0], b))
+    assert len(a.connections) == 2
+    assert (protocol, b) in a.connections
+    assert a.is_connected(b) and not b.is_connected(a)
+    assert a.connections.protocol_for(b) is protocol
+    assert a.connections.neighbors_via(protocol) == [b, c]
+    assert model.adjacency.connected_to(b) == [a, c]
+
+    a.connections.discard((protocol, b))
+    assert not a.is_connected(b)
+    assert a.connections.protocol_for(b) is None
+    assert list(a.connections) == [(protocol, c)]
+    assert model.adjacency.connected_to(b) == [c]
+    assert model.adjacency.connected_to(c) == [a]
+
+
+def test_drop_timeout_connections_updates_adjacency():
+    model = MeshModel(2, 100, 100)
+    a, b = sorted(model.schedule.agents, key=lambda device: device.name)
+    model.grid.move_agent(a, (0, 0))
+    model.grid.move_agent(b, (1, 1))
+    a.connect(b, a.protocols[0])
+    assert model.adjacency.connected_to(b) == [a]
+
+    model.grid.move_agent(b, (99, 99))
+    a._drop_timeout_connections()
+    assert len(a.connections) == 0
+    assert model.adjacency.connected_to(b) == []
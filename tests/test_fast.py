@@ -0,0 +1,72 @@
+"""Tests the array-backed model."""
+
+from __future__ import annotations
+
+import mesa
+import numpy as np
+import pytest
+
+from mesh_simulator.fast import FastMeshModel, pairs_in_radius
+from mesh_simulator.model import MeshModel
+
+
+def _run(model, steps):
+    # The topology metrics dominate the run time, so skip collecting them
+    model.datacollector = mesa.DataCollector()
+    for _ in range(steps):
+        model.step()
+
+
+def test_pairs_in_radius_matches_brute_force():
+    positions = np.random.default_rng(0).integers(0, 60, (300, 2))
+    rows = np.arange(0, 300, 3)
+    delta = positions[rows, None, :] - positions[None, :, :]
+    for manhattan, within in [(False, (delta**2).sum(axis=2) <= 49), (True, np.abs(delta).sum(axis=2) <= 7)]:
+        within[np.arange(len(rows)), rows] = False
+        sources, targets = pairs_in_radius(positions, rows, 7, manhattan=manhattan)
+        expected_sources, expected_targets = np.nonzero(within)
+        assert np.array_equal(sources, rows[expected_sources])
+        assert np.array_equal(targets, expected_targets)
+
+
+def test_fast_model_connects_devices():
+    model = FastMeshModel(30, 60, 60, seed=4)
+    _run(model, 400)
+
+    devices, peers, protocols = model.connections
+    assert len(devices) > 0
+    # Connections are symmetric and within the range of their protocol
+    assert set(zip(devices.tolist(), peers.tolist())) == set(zip(peers.tolist(), devices.tolist()))
+    distances = ((model.positions[devices] - model.positions[peers]) ** 2).sum(axis=1)
+    assert (distances <= model._scan_radius[protocols] ** 2).all()
+    assert model.consumed_energy.sum() > 0
+
+    established = [edge for edge in model.topology.edges(data="established") if edge[2]]
+    assert 2 * len(established) == len(devices)
+
+
+def test_fast_model_collects_the_reporters_of_mesh_model():
+    model = FastMeshModel(10, 20, 20, seed=1)
+    rows = list(model.iter_steps(3))
+    assert [step for step, _ in rows] == [0, 1, 2]
+    assert list(rows[0][1]) == list(MeshModel(0, 20, 20).datacollector.model_vars)
+
+
+def test_fast_model_is_reproducible():
+    first, second = FastMeshModel(40, 60, 60, seed=7), FastMeshModel(40, 60, 60, seed=7)
+    _run(first, 300)
+    _run(second, 300)
+    assert np.array_equal(first.positions, second.positions)
+    assert np.array_equal(first.connections[0], second.connections[0])
+
+
+@pytest.mark.parametrize("n_agents, size, bound", [(60, 25, 1.25), (150, 40, 1.75)])
+def test_fast_model_stays_close_to_mesh_model(n_agents, size, bound):
+    # The handshakes are approximated, so the fast model diverges most in dense meshes with long handshake queues
+    fast, mesh = FastMeshModel(n_agents, size, size, seed=1), MeshModel(n_agents, size, size, seed=1)
+    _run(fast, 300)
+    _run(mesh, 300)
+    connections = sum(len(device.connections) for device in mesh.schedule.agents)
+    energy = sum(device.consumed_energy for device in mesh.schedule.agents)
+    assert connections / bound <= len(fast.connections[0]) <= bound * connections
+    assert energy / 1.25 <= fast.consumed_energy.sum() <= 1.25 * energy
@@ -1,6 +1,16 @@
 from __future__ import annotations
 
+import json
+import os
 
-def test_int_empty():
-    # This is a placeholder test to ensure that the test suite runs.
-    pass
+from mesh_simulator.benchmark import compare, run_case
+
+
+def test_int_benchmark_200_agents():
+    case = run_case(200, 0.05, steps=1)
+    assert case["timings"]["schedule.step"]["median"] > 0
+
+    baseline = os.environ.get("MESH_SIMULATOR_BENCHMARK_BASELINE")
+    if baseline is not None:
+        with open(baseline) as file:
+            assert compare({"cases": [case]}, json.load(file)) == []
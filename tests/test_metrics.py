@@ -28,7 +28,19 @@ def test_reachability(graph):
 def test_robustness(graph):
     from mesh_simulator.analysis.metrics import robustness
 
-    assert robustness(graph) == 0.5
+    # The established triangle has 2 edge-disjoint paths between each of its 3 pairs, the potential graph additionally
+    # has 1 path between d and each of a, b and c.
+    assert robustness(graph) == 6 / 9
+
+
+def test_absolute_robustness():
+    from mesh_simulator.analysis.metrics import _absolute_robustness
+
+    g = nx.complete_graph(5)
+    nx.add_path(g, [4, 5, 6])
+    g.add_edge(7, 8)
+    # K5 has 4 edge-disjoint paths between each of its 10 pairs, the path 4-5-6 adds a single path for 5 * 2 + 1 pairs
+    assert _absolute_robustness(g) == 10 * 4 + 11 + 1
 
 
 def test_bandwidth(graph):
@@ -37,6 +49,13 @@ def test_bandwidth(graph):
     assert bandwidth(graph) == 1.0
 
 
+def test_absolute_bandwidth(graph):
+    from mesh_simulator.analysis.metrics import _absolute_bandwidth
+
+    # a-b is widest via c (20), a-c (100) and c-b (20) are direct, d is not reachable over established connections
+    assert _absolute_bandwidth(graph) == 140
+
+
 def test_latency(graph):
     from mesh_simulator.analysis.metrics import latency
 
@@ -47,3 +66,14 @@ def test_power(graph):
     from mesh_simulator.analysis.metrics import power
 
     assert power(graph) == 2 / 3
+
+
+def test_evaluate_small_reuses_cached_metrics(graph, monkeypatch):
+    from mesh_simulator.analysis import metrics
+
+    robustness = metrics.cached_metric(graph, metrics.robustness)
+    # The robustness of the graph was already computed, so it must not be computed again
+    monkeypatch.setattr(metrics, "_absolute_robustness", None)
+    expected = (0.5 + robustness + 1.0 + 1.0 + 2 / 3 + metrics.fairness(graph)) / 6
+    assert metrics.evaluate_small(graph) == pytest.approx(expected)
+    assert metrics.cached_metric(graph, metrics.evaluate_small) == metrics.evaluate_small(graph)
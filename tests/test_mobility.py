@@ -0,0 +1,86 @@
+"""Tests the mobility models."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from mesh_simulator.mobility import RandomWalk, RandomWaypoint, Static
+from mesh_simulator.model import MeshModel
+
+
+def _positions(model):
+    return [device.pos for device in model.mobility.devices]
+
+
+@pytest.mark.parametrize("mobility", [lambda: RandomWalk(0.5), lambda: RandomWaypoint(speed=2)])
+def test_mobility_is_reproducible_and_syncs_the_grid(mobility):
+    first = MeshModel(50, 20, 20, mobility=mobility(), seed=3)
+    second = MeshModel(50, 20, 20, mobility=mobility(), seed=3)
+    start = _positions(first)
+    for model in (first, second):
+        for _ in range(20):
+            model.mobility.step()
+            model.schedule.steps += 1
+
+    assert _positions(first) == _positions(second)
+    assert _positions(first) != start
+    assert [tuple(pos) for pos in first.mobility.positions.tolist()] == _positions(first)
+    for device in first.mobility.devices:
+        assert device in first.grid.get_agents_in_radius(device.pos, 0)
+        assert 0 <= device.pos[0] < 20 and 0 <= device.pos[1] < 20
+
+
+def test_random_walk_moves_to_neighboring_cells():
+    model = MeshModel(200, 10, 10, mobility=RandomWalk(1.0), seed=1)
+    before = model.mobility.positions.copy()
+    model.mobility.step()
+    distance = np.abs(model.mobility.positions - before).max(axis=1)
+    assert (distance == 1).all()
+
+
+def test_random_numbers_do_not_depend_on_other_devices():
+    mobility = MeshModel(10, 10, 10, seed=1).mobility
+    rows = np.arange(10)
+    assert mobility.uniform(rows, 5, 0)[3] == mobility.uniform(rows[3:4], 5, 0)[0]
+    assert mobility.uniform(rows, 5, 0)[3] != mobility.uniform(rows, 6, 0)[3]
+    assert mobility.uniform(rows, 5, 0)[3] != mobility.uniform(rows, 5, 1)[3]
+
+
+def test_static_devices_stay():
+    model = MeshModel(20, 10, 10, mobility=Static(), seed=1)
+    start = _positions(model)
+    for _ in range(5):
+        model.step()
+    assert _positions(model) == start
+
+
+def test_event_driven_requires_move_probability():
+    with pytest.raises(ValueError):
+        MeshModel(5, 10, 10, event_driven=True, mobility=RandomWaypoint())
+
+
+@pytest.mark.parametrize("busy", [False, True])
+def test_event_driven_moves_as_often_as_ticking(monkeypatch, busy):
+    from mesh_simulator.devices.microbit import Microbit
+    from mesh_simulator.mobility import Mobility
+
+    if busy:
+        # Devices that are activated in every step must still move
+        monkeypatch.setattr(Microbit, "idle_steps", lambda self: 0)
+    moves = []
+    sync = Mobility._sync
+    monkeypatch.setattr(Mobility, "_sync", lambda self, rows: (moves.append(len(rows)), sync(self, rows)))
+
+    rates = []
+    for event_driven in (False, True):
+        moves.clear()
+        model = MeshModel(20, 30, 30, event_driven=event_driven, seed=5)
+        while model.schedule.steps < 300:
+            model.schedule.step()
+            if not event_driven:
+                model.mobility.step()
+        rates.append(sum(moves) / (20 * 300))
+    ticking, event_driven = rates
+    assert ticking == pytest.approx(0.1, abs=0.02)
+    assert event_driven == pytest.approx(ticking, abs=0.02)
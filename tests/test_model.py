@@ -0,0 +1,57 @@
+"""Tests the mesh model."""
+
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def model():
+    from mesh_simulator.model import MeshModel
+
+    return MeshModel(5, 10, 10)
+
+
+def test_topology_shared_within_step(model):
+    assert model.topology is model.topology
+
+
+def test_topology_rebuilt_after_step(model):
+    g = model.topology
+    model.step()
+    assert model.topology is not g
+    assert set(model.topology.nodes) == set(model.schedule.agents)
+
+
+def _run_until(model, steps):
+    calls = 0
+    while model.schedule.steps < steps:
+        model.step()
+        calls += 1
+    return calls
+
+
+def test_event_driven_skips_idle_steps():
+    from mesh_simulator.model import MeshModel
+
+    ticking = MeshModel(1, 10, 10)
+    event_driven = MeshModel(1, 10, 10, event_driven=True)
+    (device,) = event_driven.schedule.agents
+    (reference,) = ticking.schedule.agents
+    reference._layout_algorithm.next_scan = device._layout_algorithm.next_scan
+
+    assert _run_until(ticking, 1000) == 1000
+    assert _run_until(event_driven, 1000) < 1000
+    assert device.consumed_energy == reference.consumed_energy > 0
+
+
+def test_robustness_is_only_reported_for_small_models():
+    from mesh_simulator.analysis.metrics import evaluate_large
+    from mesh_simulator.model import ROBUSTNESS_MAX_AGENTS, MeshModel
+
+    assert "Robustness" in MeshModel(ROBUSTNESS_MAX_AGENTS, 20, 20).datacollector.model_reporters
+    large = MeshModel(ROBUSTNESS_MAX_AGENTS + 1, 20, 20)
+    assert "Robustness" not in large.datacollector.model_reporters
+    assert large.topology_metrics["Overall Evaluation"] is evaluate_large
+    assert "Robustness" in MeshModel(ROBUSTNESS_MAX_AGENTS + 1, 20, 20, robustness=True).datacollector.model_reporters
+    assert "Robustness" not in MeshModel(5, 10, 10, robustness=False).datacollector.model_reporters
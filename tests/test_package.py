@@ -0,0 +1,29 @@
+"""Tests the lazy attributes of the package."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import mesh_simulator
+
+
+def test_lazy_attributes():
+    from mesh_simulator.model import MeshModel
+
+    assert mesh_simulator.MeshModel is MeshModel
+    assert {"MeshModel", "page", "topology_metrics", "model_params"} <= set(dir(mesh_simulator))
+    with pytest.raises(AttributeError):
+        mesh_simulator.unknown
+
+
+def test_metrics_import_neither_mesa_nor_ui():
+    code = (
+        "import sys; import mesh_simulator.analysis.metrics, mesh_simulator.analysis.parallel; "
+        "assert not {'mesa', 'solara', 'matplotlib'} & {name.split('.')[0] for name in sys.modules}"
+    )
+    src = Path(__file__).parent.parent / "src"
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, env={"PYTHONPATH": str(src)})
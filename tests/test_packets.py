@@ -0,0 +1,48 @@
+"""Tests the packet types."""
+
+from __future__ import annotations
+
+from mesh_simulator.packets import Packet
+from mesh_simulator.packets.handshake import HandshakePacket, HandshakePacketType
+
+
+def test_with_ttl_keeps_fields():
+    source, destination = object(), object()
+    packet = Packet(source, destination, 12, ttl=30)
+    forwarded = packet.with_ttl(29).with_ttl(28)
+    assert (forwarded.source, forwarded.destination, forwarded.size_estimate) == (source, destination, 12)
+    assert (forwarded.ttl, forwarded.initial_ttl) == (28, 30)
+    assert packet.ttl == 30
+
+
+def test_with_ttl_keeps_type():
+    packet = HandshakePacket(object(), object(), HandshakePacketType.RESPONSE).with_ttl(3)
+    assert isinstance(packet, HandshakePacket)
+    assert packet.state == HandshakePacketType.RESPONSE
+
+
+def test_packets_have_no_dict():
+    assert not hasattr(Packet(None, None, 1), "__dict__")
+    assert not hasattr(HandshakePacket(None, None, HandshakePacketType.REQUEST), "__dict__")
+
+
+def test_packet_sink_windows_transit_times():
+    from mesh_simulator.packets.sink import PacketSink
+
+    model_sink = PacketSink(window=3)
+    sink = PacketSink(capacity=2, window=3, parent=model_sink)
+    for step, hops in [(0, 1), (1, 2), (1, 4), (2, 3)]:
+        sink.record(step, Packet(None, None, 1, 10).with_ttl(10 - hops))
+
+    assert [step for step, _ in sink] == [1, 2]
+    assert sink.total_packets == model_sink.total_packets == 4
+    # Steps 0, 1 and 2 are in the window before step 3
+    assert sink.packets(3) == 4
+    assert sink.average_transit_time(3) == 2.5
+    assert sink.packets(4) == 3
+
+    # Step 5 overwrites the slot of step 2
+    sink.record(5, Packet(None, None, 1, 10).with_ttl(4))
+    assert sink.packets(6) == 1
+    assert model_sink.average_transit_time(6) == 6
+    assert sink.average_transit_time(9) == 0
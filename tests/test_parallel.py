@@ -0,0 +1,45 @@
+"""Tests evaluating the topology metrics in worker processes."""
+
+from __future__ import annotations
+
+import math
+
+from mesh_simulator.analysis.parallel import MetricPool, TopologySnapshot
+from mesh_simulator.model import TOPOLOGY_METRICS, MeshModel
+
+
+def _close(first, second):
+    return all(math.isclose(first[name], second[name], rel_tol=1e-9) for name in first)
+
+
+def test_snapshot_graph_has_the_same_metrics():
+    model = MeshModel(12, 15, 15, seed=5)
+    for _ in range(30):
+        model.schedule.step()
+    g = model.topology
+    snapshot = TopologySnapshot.from_graph(g).graph()
+    assert len(snapshot) == len(g) and len(snapshot.edges) == len(g.edges)
+    assert _close(
+        {name: metric(g) for name, metric in TOPOLOGY_METRICS.items()},
+        {name: metric(snapshot) for name, metric in TOPOLOGY_METRICS.items()},
+    )
+
+
+def test_pool_delivers_rows_in_step_order():
+    expected = list(MeshModel(8, 10, 10, collect_every=2, seed=5).iter_steps(9))
+    assert [step for step, _ in expected] == [0, 2, 4, 6, 8]
+
+    model = MeshModel(8, 10, 10, collect_every=2, seed=5)
+    with MetricPool(workers=2) as model.metric_pool:
+        rows = list(model.iter_steps(9))
+    assert [step for step, _ in rows] == [step for step, _ in expected]
+    assert all(_close(row, expected_row) for (_, row), (_, expected_row) in zip(rows, expected))
+    assert list(model.datacollector.get_model_vars_dataframe()["Step"]) == [0, 2, 4, 6, 8]
+
+
+def test_pool_metrics_are_profiled():
+    model = MeshModel(5, 10, 10, profile=True, seed=5)
+    with MetricPool(workers=1) as model.metric_pool:
+        list(model.iter_steps(3))
+    assert model.profiler.calls("reporter.Robustness") == 3
+    assert model.profiler.calls("reporter.Average Transit Time") == 3
@@ -0,0 +1,73 @@
+"""Tests the profiling counters."""
+
+from __future__ import annotations
+
+from mesh_simulator.fast import FastMeshModel
+from mesh_simulator.model import MeshModel
+from mesh_simulator.profiling import Profiler
+from mesh_simulator.tasks.scan import ScanTask
+
+
+def test_profiler_accumulates_calls():
+    profiler = Profiler()
+    assert profiler.call("double", lambda x: 2 * x, 3) == 6
+    profiler.wrap("double", lambda x: 2 * x)(4)
+    assert profiler.calls("double") == 2
+    assert profiler.seconds("double") > 0
+    assert profiler.seconds("unknown") == 0
+    assert list(profiler.stats()) == ["double"]
+    assert "double" in profiler.summary()
+    profiler.reset()
+    assert profiler.stats() == {}
+
+
+def test_profiled_model_times_phases_tasks_and_reporters():
+    model = MeshModel(5, 10, 10, profile=True, seed=3)
+    plain = MeshModel(5, 10, 10, seed=3)
+    assert plain.profiler is None
+    for copy in (model, plain):
+        device = copy.schedule.agents[0]
+        device.queue_task(ScanTask(device.protocols[0]))
+    for _ in range(6):
+        model.step()
+        plain.step()
+
+    profiler = model.profiler
+    assert profiler.calls("model.schedule") == 6
+    assert profiler.calls("device.layout") == 5 * 6
+    assert profiler.calls("task.ScanTask") > 0
+    assert profiler.calls("reporter.Robustness") == 6
+    assert profiler.calls("model.topology") == 6
+    data = model.datacollector.get_model_vars_dataframe()
+    assert data["model.schedule Seconds"].iloc[-1] > 0
+    # Profiling doesn't change the simulation
+    assert data["Reachability"].equals(plain.datacollector.get_model_vars_dataframe()["Reachability"])
+    assert [device.pos for device in model.schedule.agents] == [device.pos for device in plain.schedule.agents]
+
+
+def test_profiled_fast_model():
+    model = FastMeshModel(10, 20, 20, profile=True, seed=3)
+    model.step()
+    model.step()
+    assert model.profiler.calls("model.handshake") == 2
+    assert "model.handshake Seconds" in model.datacollector.model_vars
+
+
+def test_reporter_times_exclude_building_the_topology(monkeypatch):
+    import time
+
+    from mesh_simulator import model as model_module
+
+    build_topology = model_module.build_topology
+
+    def slow_build_topology(model):
+        time.sleep(0.02)
+        return build_topology(model)
+
+    monkeypatch.setattr(model_module, "build_topology", slow_build_topology)
+    model = MeshModel(5, 10, 10, profile=True, seed=3)
+    model.step()
+    model.step()
+    profiler = model.profiler
+    assert profiler.seconds("model.topology") >= 0.04
+    assert profiler.seconds("reporter.Reachability") < 0.02
@@ -0,0 +1,64 @@
+"""Tests streaming the collected metrics to chunk files."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from mesh_simulator import recorder
+from mesh_simulator.fast import FastMeshModel
+from mesh_simulator.model import MeshModel
+from mesh_simulator.recorder import MetricRecorder
+
+
+@pytest.mark.parametrize("file_format", ["npz", "parquet"])
+def test_recorded_metrics_match_the_datacollector(tmp_path, file_format):
+    if file_format == "parquet":
+        pytest.importorskip("pyarrow")
+    reference = MeshModel(6, 10, 10, seed=4)
+    for _ in range(7):
+        reference.step()
+    expected = reference.datacollector.get_model_vars_dataframe()
+
+    model = MeshModel(6, 10, 10, seed=4)
+    with MetricRecorder(tmp_path, chunk_size=3, agent_counters=True, file_format=file_format) as model.recorder:
+        for _ in range(7):
+            model.step()
+    assert len(model.datacollector.model_vars["Reachability"]) == 1
+    assert len(list(tmp_path.glob("metrics-*"))) == 3
+
+    data = recorder.read(tmp_path)
+    assert list(data["Step"]) == list(range(7))
+    for name in expected:
+        assert np.allclose(data[name], expected[name].astype(float))
+    agents = recorder.read(tmp_path, "agents", columns=["Step", "Agent", "Consumed Energy"])
+    assert list(agents.columns) == ["Step", "Agent", "Consumed Energy"]
+    assert len(agents) == 7 * 6
+    last = agents[agents["Step"] == 6].sort_values("Agent")
+    assert list(last["Consumed Energy"]) == [device.consumed_energy for device in model.mobility.devices]
+
+
+def test_npz_chunks_are_memory_mapped(tmp_path):
+    model = FastMeshModel(10, 20, 20, seed=1)
+    model.recorder = MetricRecorder(tmp_path, chunk_size=2, agent_counters=True, file_format="npz")
+    for _ in range(3):
+        model.step()
+    model.recorder.close()
+    chunks = list(recorder.iter_chunks(tmp_path, "agents"))
+    assert [len(chunk["Agent"]) for chunk in chunks] == [20, 10]
+    assert isinstance(chunks[0]["Total Data"], np.memmap)
+    assert (chunks[1]["Total Data"] == model.total_data).all()
+
+
+def test_recorder_refuses_to_overwrite_chunks(tmp_path):
+    model = MeshModel(2, 5, 5, seed=1)
+    with MetricRecorder(tmp_path, file_format="npz") as model.recorder:
+        model.step()
+    with pytest.raises(ValueError):
+        MetricRecorder(tmp_path, file_format="npz")
+
+
+def test_compressed_npz_chunks_are_rejected(tmp_path):
+    np.savez_compressed(tmp_path / "metrics-00000.npz", Step=np.arange(3))
+    with pytest.raises(ValueError):
+        list(recorder.iter_chunks(tmp_path))
@@ -0,0 +1,147 @@
+"""Tests the routing algorithms."""
+
+from __future__ import annotations
+
+import pytest
+
+from mesh_simulator.packets import Packet
+
+
+@pytest.fixture
+def devices():
+    from mesh_simulator.model import MeshModel
+
+    model = MeshModel(5, 10, 10)
+    devices = sorted(model.schedule.agents, key=lambda device: device.name)
+    # Connect the first four devices with each other, the last one is unreachable
+    for device in devices[:4]:
+        for other in devices[:4]:
+            if device is not other:
+                device.connections.add((device.protocols[0], other))
+    return devices
+
+
+def test_flood_routing_suppresses_duplicates(devices):
+    a, b, c, _, unreachable = devices
+    packet = Packet(a, unreachable, 1)
+
+    b.routing_algorithm.route(a, a.protocols[0], packet)
+    assert len(b._tasks) == 2
+    b.routing_algorithm.route(c, c.protocols[0], packet.with_ttl(20))
+    assert len(b._tasks) == 2
+    assert b.routing_algorithm.suppressed_duplicates == 1
+
+    # Routing a packet again on its own is no duplicate
+    b.routing_algorithm.route(b, None, packet)
+    assert len(b._tasks) == 5
+    assert b.routing_algorithm.suppressed_duplicates == 1
+
+
+def test_flood_routing_forgets_least_recent_packets(devices):
+    a, b, _, _, unreachable = devices
+    b.routing_algorithm.cache_size = 2
+    first, second, third = (Packet(a, unreachable, 1) for _ in range(3))
+    for packet in (first, second, first, third, first):
+        b.routing_algorithm.route(a, a.protocols[0], packet)
+    # The second packet was forgotten when the third arrived, while the first one was refreshed
+    assert b.routing_algorithm.suppressed_duplicates == 2
+    b.routing_algorithm.route(a, a.protocols[0], second)
+    assert b.routing_algorithm.suppressed_duplicates == 2
+
+
+@pytest.fixture
+def line():
+    from mesh_simulator.model import MeshModel
+    from mesh_simulator.routing.distance_vector import DistanceVectorRouting
+
+    model = MeshModel(4, 10, 10)
+    devices = sorted(model.schedule.agents, key=lambda device: device.name)
+    # Connect the devices in a line, each only to its predecessor and successor
+    for device, other in zip(devices, devices[1:]):
+        device.connections.add((device.protocols[0], other))
+        other.connections.add((other.protocols[0], device))
+    for device in devices:
+        device._routing_algorithm = DistanceVectorRouting(device)
+    return devices
+
+
+def _exchange_routes(devices):
+    for device in devices:
+        device.routing_algorithm._advertise()
+        assert not device._tasks
+
+
+def test_distance_vector_routing_learns_shortest_routes(line):
+    a, b, c, d = line
+    for _ in range(3):
+        _exchange_routes(line)
+    routes = a.routing_algorithm.routes
+    assert {destination: (route.next_hop, route.hops) for destination, route in routes.items()} == {
+        b: (b, 1),
+        c: (b, 2),
+        d: (b, 3),
+    }
+    # Advertisements are consumed by the routing algorithm
+    assert len(d.received_packets) == 0
+
+
+def test_distance_vector_routing_forwards_along_single_path(line):
+    a, b, c, d = line
+    for _ in range(3):
+        _exchange_routes(line)
+    b.routing_algorithm.route(a, a.protocols[0], Packet(a, d, 1, 10))
+    assert len(b._tasks) == 1
+    assert b._tasks.peek().peer is c
+
+
+def test_distance_vector_routing_invalidates_routes(line, monkeypatch):
+    a, b, c, d = line
+    for _ in range(3):
+        _exchange_routes(line)
+    # c moved out of range of b, so b drops the connection when it checks for dead connections
+    protocol_type = type(b.protocols[0])
+    can_connect = protocol_type.can_connect
+    monkeypatch.setattr(
+        protocol_type, "can_connect", lambda self, other: {self.device, other} != {b, c} and can_connect(self, other)
+    )
+    b._drop_timeout_connections()
+    assert not b.is_connected(c)
+    assert c not in b.routing_algorithm.routes and d not in b.routing_algorithm.routes
+    b.routing_algorithm.route(a, a.protocols[0], Packet(a, d, 1, 10))
+    assert not b._tasks
+    assert b.routing_algorithm.dropped_packets == 1
+
+    # Routes that aren't advertised again expire
+    a.model.schedule.steps += a.routing_algorithm.route_timeout
+    assert a.routing_algorithm.next_hop(b) is None
+
+
+def test_distance_vector_routing_drops_misrouted_advertisements(line):
+    from mesh_simulator.packets.route import RouteAdvertisement
+
+    a, b, c, d = line
+    advertisement = RouteAdvertisement(a, b, ((d, 1),))
+    # A link dropped while the advertisement was in flight, so it ends up at another neighbor
+    c.on_packet(b, b.protocols[0], advertisement)
+    b.routing_algorithm.route(b, b.protocols[0], advertisement)
+    assert not c.routing_algorithm.routes
+    assert not b._tasks
+    assert b.routing_algorithm.dropped_packets == 0
+
+
+def test_distance_vector_routing_keeps_queues_bounded(monkeypatch):
+    from mesh_simulator.devices.microbit import Microbit
+    from mesh_simulator.model import MeshModel
+    from mesh_simulator.routing.distance_vector import DistanceVectorRouting
+    from mesh_simulator.tasks.sendpacket import SendPacketTask
+
+    monkeypatch.setattr(Microbit, "routing_type", DistanceVectorRouting)
+    model = MeshModel(30, 30, 30, seed=4)
+    for _ in range(4):
+        for _ in range(100):
+            model.schedule.step()
+            model.mobility.step()
+        devices = model.schedule.agents
+        assert sum(isinstance(task, SendPacketTask) for device in devices for task in device._tasks) == 0
+        assert sum(len(device._tasks) for device in devices) < 20 * len(devices)
+    assert any(device.routing_algorithm.routes for device in model.schedule.agents)
@@ -0,0 +1,52 @@
+"""Tests the spatial index of the mesh grid."""
+
+from __future__ import annotations
+
+import random
+
+import mesa
+import pytest
+
+from mesh_simulator.space import MeshGrid
+
+
+@pytest.fixture
+def grid():
+    model = mesa.Model()
+    grid = MeshGrid(200, 120, bucket_size=7)
+    rnd = random.Random(4)
+    for i in range(300):
+        grid.place_agent(mesa.Agent(i, model), (rnd.randrange(grid.width), rnd.randrange(grid.height)))
+    return grid
+
+
+def _agents(grid):
+    return [agent for content, _pos in grid.coord_iter() for agent in content]
+
+
+def _brute_force(grid, pos, radius, manhattan):
+    x, y = pos
+    result = set()
+    for agent in _agents(grid):
+        ax, ay = agent.pos
+        distance = abs(ax - x) + abs(ay - y) if manhattan else ((ax - x) ** 2 + (ay - y) ** 2) ** 0.5
+        if distance <= radius:
+            result.add(agent)
+    return result
+
+
+@pytest.mark.parametrize("manhattan", [False, True])
+@pytest.mark.parametrize("radius", [0, 5, 30, 500])
+def test_radius_query(grid, radius, manhattan):
+    for pos in [(0, 0), (100, 60), (199, 119), (13, 97)]:
+        found = grid.get_agents_in_radius(pos, radius, manhattan=manhattan)
+        assert len(found) == len(set(found))
+        assert set(found) == _brute_force(grid, pos, radius, manhattan)
+
+
+def test_radius_query_after_moves(grid):
+    rnd = random.Random(7)
+    for agent in _agents(grid):
+        grid.move_agent(agent, (rnd.randrange(grid.width), rnd.randrange(grid.height)))
+    grid.remove_agent(_agents(grid)[0])
+    assert set(grid.get_agents_in_radius((50, 50), 40)) == _brute_force(grid, (50, 50), 40, False)
@@ -0,0 +1,47 @@
+"""Tests the parameter sweeps."""
+
+from __future__ import annotations
+
+import pytest
+
+from mesh_simulator.sweep import parameter_grid, run_replicate
+
+
+def test_parameter_grid():
+    grid = parameter_grid({"n_agents": [2, 3], "width": [10], "height": [10, 20]})
+    assert len(grid) == 4
+    assert grid[0] == {"n_agents": 2, "width": 10, "height": 10}
+
+
+def test_run_replicate_is_reproducible():
+    parameters = {"n_agents": 4, "width": 10, "height": 10}
+    rows = run_replicate(parameters, 7, 3)
+    assert [row["Step"] for row in rows] == [0, 1, 2]
+    assert rows[0]["seed"] == 7 and rows[0]["n_agents"] == 4
+    assert rows == run_replicate(parameters, 7, 3)
+
+
+def test_spark_sweep():
+    pytest.importorskip("pyspark")
+    from pyspark.sql import SparkSession
+
+    from mesh_simulator.sweep import sweep
+
+    spark = SparkSession.builder.master("local[2]").getOrCreate()
+    try:
+        # Every combination gets all seeds, even from a one-shot iterable
+        df = sweep(spark, {"n_agents": [2, 3], "width": [10], "height": [10]}, seeds=iter([1, 2]), steps=3)
+        assert df.count() == 2 * 2 * 3
+        assert {"n_agents", "seed", "Step", "Reachability"} <= set(df.columns)
+    finally:
+        spark.stop()
+
+
+def test_spark_types_hold_all_values():
+    types = pytest.importorskip("pyspark.sql.types")
+    from mesh_simulator.sweep import _spark_type
+
+    assert _spark_type([10, 20]) == types.LongType()
+    assert _spark_type([10, 12.5]) == types.DoubleType()
+    assert _spark_type([True, False]) == types.BooleanType()
+    assert _spark_type([True, 1]) == types.StringType()
@@ -0,0 +1,41 @@
+"""Tests the task queue of the devices."""
+
+from __future__ import annotations
+
+import pytest
+
+from mesh_simulator.model import MeshModel
+from mesh_simulator.packets import Packet
+from mesh_simulator.tasks.handshake import HandshakeTask
+from mesh_simulator.tasks.queue import TaskQueue
+from mesh_simulator.tasks.scan import ScanTask
+from mesh_simulator.tasks.sendpacket import SendPacketTask
+
+
+def test_task_queue_runs_lanes_by_priority():
+    model = MeshModel(2, 10, 10)
+    a, b = sorted(model.schedule.agents, key=lambda device: device.name)
+    protocol = a.protocols[0]
+    scan = ScanTask(protocol)
+    send = SendPacketTask(b, protocol, Packet(a, b, 1))
+    first, second = HandshakeTask(b, protocol), HandshakeTask(b, protocol)
+
+    queue = TaskQueue()
+    for task in (scan, send, first, second):
+        queue.push(task)
+    assert len(queue) == 4
+    assert list(queue) == [first, second, send, scan]
+    assert queue.has_task(HandshakeTask, b) and queue.has_task(SendPacketTask, b)
+    assert not queue.has_task(HandshakeTask, a)
+
+    assert queue.pop() is first
+    assert queue.has_task(HandshakeTask, b)
+    queue.remove(send)
+    assert not queue.has_task(SendPacketTask, b)
+    assert queue.peek() is second
+    queue.remove(second)
+    assert not queue.has_task(HandshakeTask, b)
+    assert queue.pop() is scan
+    assert queue.peek() is None and len(queue) == 0
+    with pytest.raises(IndexError):
+        queue.pop()
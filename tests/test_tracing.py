@@ -0,0 +1,37 @@
+"""Tests the switches for hot-path log messages."""
+
+from __future__ import annotations
+
+import pytest
+
+from mesh_simulator import tracing
+
+
+class _Device:
+    def __init__(self, name):
+        self.name = name
+
+
+@pytest.fixture(autouse=True)
+def _disable_tracing():
+    yield
+    tracing.disable()
+
+
+def test_tracing_is_disabled_by_default():
+    assert not tracing.active
+    assert not tracing.traces("device", _Device("Agent 0"))
+
+
+def test_tracing_filters_subsystems_and_devices():
+    tracing.enable("routing", devices=["Agent 0"])
+    assert tracing.active
+    assert tracing.traces("routing", _Device("Agent 0"))
+    assert not tracing.traces("routing", _Device("Agent 1"))
+    assert not tracing.traces("device", _Device("Agent 0"))
+
+    tracing.enable()
+    assert tracing.traces("device", _Device("Agent 1"))
+
+    with pytest.raises(ValueError):
+        tracing.enable("network")
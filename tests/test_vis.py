@@ -0,0 +1,55 @@
+"""Tests the batched topology rendering."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("solara")
+
+from mesh_simulator.model import MeshModel  # noqa: E402
+from mesh_simulator.vis import ConnectionsView  # noqa: E402
+
+
+def test_connections_view_updates_artists_in_place():
+    model = MeshModel(10, 8, 8, seed=1)
+    for _ in range(40):
+        model.schedule.step()
+    view = ConnectionsView(8, 8)
+    view.update(model)
+    devices, links = view._devices, view._links
+    assert len(devices.get_offsets()) == 10
+    pairs = {frozenset((agent, other)) for agent in model.schedule.agents for other in agent.established_neighbors}
+    assert len(links.get_segments()) == len(pairs)
+
+    model.schedule.step()
+    view.update(model)
+    assert view._devices is devices and view._links is links
+    assert len(view.figure.axes[0].collections) == 2
+
+
+def test_connections_view_falls_back_to_heatmap():
+    model = MeshModel(10, 8, 8, seed=1)
+    view = ConnectionsView(8, 8, heatmap_threshold=5)
+    view.update(model)
+    assert view._devices is None
+    assert view._heatmap.get_array().sum() == 10
+
+
+def test_metrics_chart_appends_and_decimates():
+    from types import SimpleNamespace
+
+    from mesh_simulator.vis import MetricsChartView
+
+    model_vars = {"Reachability": [], "Robustness": []}
+    model = SimpleNamespace(datacollector=SimpleNamespace(model_vars=model_vars))
+    chart = MetricsChartView(["Reachability", "Robustness"], max_points=20)
+    for step in range(100):
+        model_vars["Reachability"].append(step % 7)
+        model_vars["Robustness"].append(5.0 if step == 42 else 0.5)
+        chart.update(model)
+    assert chart.rows == 100
+    x, y = chart._lines[1].get_data()
+    assert len(x) <= 40 and list(x) == sorted(x)
+    # The spike survives the decimation
+    assert max(y) == 5.0 and 42 in x